@@ -0,0 +1,31 @@
+"""
+Converts finished months to the binary archive format (csv backend only).
+Archived months are read without parsing text and keep their totals precomputed.
+
+Example:
+    python Baito_archive.py --until 2024-12
+"""
+import argparse
+from module.shift_manage import BaitoManage
+from module.storage import STORAGE_BACKEND, DEFAULT_WORKER, list_workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert finished months to the binary archive format.")
+    parser.add_argument("--until", help="last month to convert in yyyy-mm format. The previous month if omitted.")
+    parser.add_argument("--worker", action="append", dest="workers",
+                        help="worker to convert (repeatable). All workers if omitted. Use '' for the default worker.")
+    args = parser.parse_args()
+
+    if STORAGE_BACKEND != "csv":
+        print(f"The {STORAGE_BACKEND} backend has no archive format. Nothing to do.")
+        return
+    workers = args.workers if args.workers is not None else [DEFAULT_WORKER] + list_workers()
+    for worker in workers:
+        year_months = BaitoManage.archive_months(args.until, worker)
+        print(f"{worker or '(default)'}: {len(year_months)} month(s) archived"
+              + (f" ({year_months[0]} - {year_months[-1]})" if year_months else ""))
+
+
+if __name__ == "__main__":
+    main()
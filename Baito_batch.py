@@ -0,0 +1,42 @@
+"""
+Headless payroll batch.
+Calculates the payroll of every month in a range for every worker using all CPU cores and writes a report.
+
+Example:
+    python Baito_batch.py 2024-01 2024-12 --output payroll_2024.csv
+"""
+import argparse
+from module.payroll_batch import run_payroll, summarize_payroll, write_report
+from module.storage import STORAGE_BACKEND
+from module.utils import thousands_separators
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculate payroll for a range of months.")
+    parser.add_argument("start", help="first month in yyyy-mm format")
+    parser.add_argument("end", help="last month in yyyy-mm format")
+    parser.add_argument("--worker", action="append", dest="workers",
+                        help="worker to include (repeatable). All workers if omitted. Use '' for the default worker.")
+    parser.add_argument("--data-dir", action="append", dest="directories",
+                        help="csv data directory to include (repeatable). worktime_info if omitted.")
+    parser.add_argument("--backend", default=STORAGE_BACKEND, choices=["csv", "sqlite"],
+                        help=f"storage backend. Defaults to {STORAGE_BACKEND}.")
+    parser.add_argument("--processes", type=int, help="number of worker processes. Number of CPUs if omitted.")
+    parser.add_argument("--output", default="payroll_report.csv",
+                        help="report file (.csv or .json). Defaults to payroll_report.csv.")
+    args = parser.parse_args()
+
+    rows = run_payroll(args.start, args.end, args.workers, args.directories, args.backend, args.processes)
+    write_report(rows, args.output)
+    summary = summarize_payroll(rows)
+    # the directory is only shown when workers of several directories are listed
+    several_directories = len({directory for directory, _ in summary}) > 1
+    for (directory, worker), totals in summary.items():
+        label = f"{directory}: {worker or '(default)'}" if several_directories else worker or "(default)"
+        print(f"{label}: {thousands_separators(int(totals['pay']))} yen, "
+              f"{totals['hours']:g} hours, {totals['days']} days")
+    print(f"\n{len(rows)} month(s) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
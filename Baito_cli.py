@@ -0,0 +1,265 @@
+"""
+Non-interactive command line interface for scripts and cron jobs.
+Every action is a subcommand; "batch" runs one subcommand per line of stdin in a single process, so the
+startup cost is paid once per batch instead of once per action.
+
+Exit codes:
+    add, remove: the negated return value of BaitoManage.add_entry / remove_entry, e.g. 2 if an entry with the
+        same date already exists (see add_entry for the others).
+    import: 1 if any row was rejected.
+    batch: exit code of the first command that failed. Every line is run, even after a failure.
+    1 if a file cannot be read or written, e.g. a file to import that does not exist.
+    64 for invalid arguments, including an invalid worker name.
+
+Example:
+    python Baito_cli.py add 2024-07-01 17:00 22:00
+    python Baito_cli.py pay --range 2024-01 2024-06 --worker tanaka
+    python Baito_cli.py list 2024-07 --json
+    python Baito_cli.py migrate csv sqlite
+    printf 'add 2024-07-01 17:00 22:00\\nadd 2024-07-02 22:00 02:00\\npay --month 2024-07\\n' | python Baito_cli.py batch
+"""
+import argparse
+import json
+import shlex
+import sys
+from module.data_entry import parse_date, parse_year_month
+from module.shift_manage import BaitoManage
+from module.shift_transfer import FORMATS
+from module.storage import DEFAULT_WORKER, create_storage, list_workers, migrate_storage
+from module.utils import thousands_separators
+
+EXIT_USAGE = 64
+
+
+class CommandError(Exception):
+    """
+    Invalid arguments of a command.
+    """
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    # raises instead of exiting, so that an invalid line of a batch does not end the batch
+    def error(self, message):
+        raise CommandError(message)
+
+
+def _argument_type(parse, name: str):
+    def convert(text: str) -> str:
+        try:
+            return parse(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid {name}: {text}") from None
+    return convert
+
+
+def _year(text: str) -> str:
+    if len(text) != 4 or not text.isdigit():
+        raise ValueError(text)
+    return text
+
+
+_month_type = _argument_type(parse_year_month, "month (yyyy-mm)")
+
+
+def add(args: argparse.Namespace) -> int:
+    try:
+        year_month, day = parse_date(args.date)
+    except ValueError:
+        # checked here, as add_entry creates the file of the month before it checks the day
+        print("\nInvalid year/month or day.")
+        return 1
+    return -BaitoManage.add_entry(year_month, day, args.start, args.end, args.worker)
+
+
+def remove(args: argparse.Namespace) -> int:
+    try:
+        year_month, day = parse_date(args.date)
+    except ValueError:
+        print("\nInvalid year/month or day.")
+        return 1
+    return -BaitoManage.remove_entry(year_month, day, args.worker)
+
+
+def pay(args: argparse.Namespace) -> int:
+    if args.month:
+        start_year_month = end_year_month = args.month
+    elif args.year:
+        start_year_month, end_year_month = f"{args.year}-01", f"{args.year}-12"
+    else:
+        start_year_month, end_year_month = args.range
+    summary = BaitoManage.get_pay_summary(start_year_month, end_year_month, args.worker)
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+    rows = list(summary["months"].items()) if args.range else []
+    rows.append((args.month or args.year or "total", summary["total"]))
+    for label, totals in rows:
+        print(f"{label}: {thousands_separators(int(totals['pay']))} yen, "
+              f"{totals['hours']:g} hours, {totals['days']} days")
+    return 0
+
+
+def list_workdays(args: argparse.Namespace) -> int:
+    details = BaitoManage.get_workday_details(args.start, args.end or args.start, args.worker)
+    if args.json:
+        keys = ("date", "start_time", "end_time", "hours", "pay")
+        print(json.dumps([dict(zip(keys, detail)) for detail in details]))
+        return 0
+    for date, start_time, end_time, hours, paying in details:
+        print(f"{date}  {start_time} - {end_time}  {hours:g} hours  {thousands_separators(int(paying))} yen")
+    return 0
+
+
+def import_entries(args: argparse.Namespace) -> int:
+    report = BaitoManage.import_entries(args.path, args.file_format, args.worker, args.replace)
+    for line_number, date, reason in report["rejected"]:
+        print(f"line {line_number}: {date or '(no date)'}: {reason}")
+    print(f"{report['added']} work day(s) imported")
+    return 1 if report["rejected"] else 0
+
+
+def export_entries(args: argparse.Namespace) -> int:
+    count = BaitoManage.export_entries(args.output, args.start, args.end, args.file_format, args.worker)
+    if args.output != "-":
+        print(f"{count} work day(s) written to {args.output}")
+    return 0
+
+
+def migrate(args: argparse.Namespace) -> int:
+    if args.source == args.destination:
+        print("Source and destination backend are the same.", file=sys.stderr)
+        return EXIT_USAGE
+    workers = [DEFAULT_WORKER] + list_workers(args.source)
+    months = sum(migrate_storage(create_storage(args.source, worker), create_storage(args.destination, worker))
+                 for worker in workers)
+    print(f"{months} month(s) of {len(workers)} worker(s) copied from {args.source} to {args.destination}")
+    return 0
+
+
+def batch(args: argparse.Namespace) -> int:
+    parser = build_parser()
+    first_failure = 0
+    for line_number, line in enumerate(sys.stdin, start=1):
+        try:
+            argv = shlex.split(line, comments=True)
+        except ValueError as error:
+            print(f"line {line_number}: {error}", file=sys.stderr)
+            code = EXIT_USAGE
+        else:
+            if not argv:
+                continue
+            if argv[0] == "batch":
+                print(f"line {line_number}: batch cannot be nested", file=sys.stderr)
+                code = EXIT_USAGE
+            else:
+                code = run_command(parser, argv)
+        if code:
+            print(f"line {line_number}: exit code {code}", file=sys.stderr)
+            if not first_failure:
+                first_failure = code
+        sys.stdout.flush()
+    return first_failure
+
+
+def build_parser() -> _ArgumentParser:
+    """
+    Build the parser of every subcommand. The function to run is stored as the "run" argument.
+
+    Returns:
+        _ArgumentParser: parser of the command line.
+    """
+    worker = _ArgumentParser(add_help=False)
+    worker.add_argument("--worker", help="name of the worker. The default worker if omitted.")
+    file_format = _ArgumentParser(add_help=False)
+    file_format.add_argument("--format", choices=FORMATS, dest="file_format",
+                             help="file format. Detected from the file extension if omitted (csv for stdin/stdout).")
+    parser = _ArgumentParser(description="Manage work days without prompts.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", parents=[worker], help="add a work day")
+    add_parser.add_argument("date", help="date in yyyy-mm-dd format")
+    # the times are checked by add_entry, so that an invalid time exits with its code
+    add_parser.add_argument("start", help="start time in hh:mm format")
+    add_parser.add_argument("end", help="end time in hh:mm format. At or before start if the shift ends on the next day.")
+    add_parser.set_defaults(run=add)
+
+    remove_parser = subparsers.add_parser("remove", parents=[worker], help="remove a work day")
+    remove_parser.add_argument("date", help="date in yyyy-mm-dd format")
+    remove_parser.set_defaults(run=remove)
+
+    pay_parser = subparsers.add_parser("pay", parents=[worker], help="show the total paying")
+    period = pay_parser.add_mutually_exclusive_group(required=True)
+    period.add_argument("--month", type=_month_type, help="month in yyyy-mm format")
+    period.add_argument("--year", type=_argument_type(_year, "year (yyyy)"), help="year in yyyy format")
+    period.add_argument("--range", nargs=2, type=_month_type, metavar=("START", "END"),
+                        help="first and last month in yyyy-mm format, shown month by month")
+    pay_parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    pay_parser.set_defaults(run=pay)
+
+    list_parser = subparsers.add_parser("list", parents=[worker], help="list the work days with hours and paying")
+    list_parser.add_argument("start", type=_month_type, help="month in yyyy-mm format")
+    list_parser.add_argument("end", nargs="?", type=_month_type, help="last month in yyyy-mm format")
+    list_parser.add_argument("--json", action="store_true", help="print the work days as JSON")
+    list_parser.set_defaults(run=list_workdays)
+
+    import_parser = subparsers.add_parser("import", parents=[worker, file_format], help="add the work days of a file")
+    import_parser.add_argument("path", help="file to import, or - for stdin")
+    import_parser.add_argument("--replace", action="store_true",
+                               help="replace existing work days of the same dates instead of skipping them")
+    import_parser.set_defaults(run=import_entries)
+
+    export_parser = subparsers.add_parser("export", parents=[worker, file_format],
+                                          help="write the work days of a range of months")
+    export_parser.add_argument("start", type=_month_type, help="first month in yyyy-mm format")
+    export_parser.add_argument("end", type=_month_type, help="last month in yyyy-mm format")
+    export_parser.add_argument("--output", default="-", help="file to write, or - for stdout (default)")
+    export_parser.set_defaults(run=export_entries)
+
+    migrate_parser = subparsers.add_parser("migrate", help="copy the months of every worker to another storage backend")
+    migrate_parser.add_argument("source", choices=["csv", "sqlite"], help="backend to copy from")
+    migrate_parser.add_argument("destination", choices=["csv", "sqlite"],
+                                help="backend to copy to. Months that exist in both are replaced.")
+    migrate_parser.set_defaults(run=migrate)
+
+    batch_parser = subparsers.add_parser("batch", help="run one command per line of stdin (# starts a comment)")
+    batch_parser.set_defaults(run=batch)
+    return parser
+
+
+def run_command(parser: _ArgumentParser, argv: list[str]) -> int:
+    """
+    Parse and run a single command.
+
+    Args:
+        parser (_ArgumentParser): parser of the command line (see build_parser).
+        argv (list[str]): arguments of the command, without the program name.
+
+    Returns:
+        int: exit code of the command.
+    """
+    try:
+        args = parser.parse_args(argv)
+    except CommandError as error:
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return EXIT_USAGE
+    except SystemExit as system_exit:
+        # --help
+        return system_exit.code or 0
+    try:
+        return args.run(args)
+    except OSError as error:
+        # e.g. a file to import that does not exist
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return 1
+    except ValueError as error:
+        # e.g. an invalid worker name
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return EXIT_USAGE
+
+
+def main():
+    raise SystemExit(run_command(build_parser(), sys.argv[1:]))
+
+
+if __name__ == "__main__":
+    main()
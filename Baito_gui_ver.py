@@ -1,22 +1,50 @@
 #!/usr/bin/env python
 # -*- coding: utf8 -*-
+from __future__ import annotations
 import sys
+import traceback
 import tkinter as tk
 from tkinter import ttk, messagebox
-from tkcalendar import Calendar
-from module.utils import get_current_date
-from module.baito_configuration import BaitoConfiguration
+from module.utils import get_current_date, thousands_separators
+from module.baito_configuration import get_config
 from module.shift_manage import BaitoManage
+from module.background_service import BackgroundService
+from module.instrumentation import log_event, timed
+from module.workday_cache import WorkdayCache, iter_days
+from calendar import monthrange
 from datetime import datetime, date
-from time import sleep
-config = BaitoConfiguration()
+from typing import Callable, TYPE_CHECKING
+if TYPE_CHECKING:
+  from tkcalendar import Calendar
+config = get_config()
 
-DATE_FORMAT = config.get_date_format()
+DATE_FORMAT = config.date_format
 
 
-def add_workday(root: tk.Tk, date: str, start_time: str, end_time: str) -> None:
+service: BackgroundService | None = None
+workday_cache: WorkdayCache | None = None
+
+
+def update_calendar_events(cal: Calendar, events: dict[date, int], new_dates: set[date], text: str, tag: str) -> None:
+  """
+  Update the events of a calendar to mark exactly new_dates, creating and removing only the events that changed.
+
+  Args:
+      cal (Calendar): The calendar to update.
+      events (dict[date, int]): The event ids of the currently marked dates. Updated in place.
+      new_dates (set[date]): The dates to mark.
+      text (str): The text of the created events.
+      tag (str): The tag of the created events.
   """
-  Add a workday to the csv file.
+  for old_date in events.keys() - new_dates:
+    cal.calevent_remove(events.pop(old_date))
+  for new_date in new_dates - events.keys():
+    events[new_date] = cal.calevent_create(new_date, text, tag)
+
+
+def add_workday(root: tk.Tk, date: str, start_time: str, end_time: str, on_done: Callable[[], None] | None = None) -> None:
+  """
+  Add a workday to the csv file in the background.
   Called when the user clicks the "Add Workday" button or presses the Enter key.
 
   Args:
@@ -24,128 +52,118 @@ def add_workday(root: tk.Tk, date: str, start_time: str, end_time: str) -> None:
       date (str): year, month, and day in "yyyy-mm-dd" format.
       start_time (str): start time in "hh:mm" format.
       end_time (str): end time in "hh:mm" format.
+      on_done (Callable[[], None] | None, optional): Called after the result is shown. Defaults to None.
   """
   if date == "":
     messagebox.showerror("Error", "Please select a date")
     root.update_idletasks()
     return
   year, month, day = date.split("-")
-  state = BaitoManage.add_entry(f"{year}-{month}", day, start_time, end_time)
-  if state == 0:
-    messagebox.showinfo("Success", "Entry added successfully")
-  elif state == -1:
-    messagebox.showerror("Error", "Invalid year/month or day")
-  elif state == -2:
-    messagebox.showerror("Error", "Entry with the same date already exists")
-  elif state == -3:
-    messagebox.showerror("Error", "Invalid start/end time")
-    
-  root.update_idletasks()
-
-def remove_workday(root: tk.Tk, date: str) -> None:
+  
+  def show_result(state: int) -> None:
+    if state == 0:
+      workday_cache.invalidate(int(year), int(month))
+      messagebox.showinfo("Success", "Entry added successfully")
+    elif state == -1:
+      messagebox.showerror("Error", "Invalid year/month or day")
+    elif state == -2:
+      messagebox.showerror("Error", "Entry with the same date already exists")
+    elif state == -3:
+      messagebox.showerror("Error", "Invalid start/end time")
+    elif state == -4:
+      messagebox.showerror("Error", "Shift overlaps the shift of another date")
+    if on_done:
+      on_done()
+  
+  service.submit(None, BaitoManage.add_entry, f"{year}-{month}", day, start_time, end_time,
+                 on_done=show_result, on_error=lambda error: show_result(-1))
+
+def remove_workday(root: tk.Tk, date: str, on_done: Callable[[], None] | None = None) -> None:
   """
-  Remove a workday from the csv file.
+  Remove a workday from the csv file in the background.
   Called when the user clicks the "Delete Workday" button or presses the Enter key.
 
   Args:
       root (tk.Tk): The root window.
       date (str): year, month, and day in "yyyy-mm-dd" format.
+      on_done (Callable[[], None] | None, optional): Called after the result is shown. Defaults to None.
   """
   if date == "":
     messagebox.showerror("Error", "Please select a date")
     root.update_idletasks()
     return
   year, month, day = date.split("-")
-  state = BaitoManage.remove_entry(f"{year}-{month}", day)
-  if state == 0:
-    messagebox.showinfo("Success", "Entry removed successfully")
-  elif state == -1:
-    messagebox.showerror("Error", "Invalid year/month or day")
-    
-  root.update_idletasks()
+  
+  def show_result(state: int) -> None:
+    if state == 0:
+      workday_cache.invalidate(int(year), int(month))
+      messagebox.showinfo("Success", "Entry removed successfully")
+    elif state == -1:
+      messagebox.showerror("Error", "Invalid year/month or day")
+    if on_done:
+      on_done()
+  
+  service.submit(None, BaitoManage.remove_entry, f"{year}-{month}", day,
+                 on_done=show_result, on_error=lambda error: show_result(-1))
 
-def get_monthly_pay(root: tk.Tk, year: str, month: str) -> str:
+def get_monthly_pay(root: tk.Tk, year: str, month: str, on_done: Callable[[str], None]) -> None:
   """
-  Get the total pay for the month.
+  Get the total pay for the month in the background.
   Called when the user clicks the "Get Paying" button or presses the Enter key
 
   Args:
       root (tk.Tk): The root window.
       year (str): year in "yyyy" format.
       month (str): month in "mm" format.
-
-  Returns:
-      str: The total pay for the month.
+      on_done (Callable[[str], None]): Called with the total pay for the month, or "---" on error.
   """
-  try:
-    total_pay = BaitoManage.get_monthly_pay(f"{year}-{month}", returntype="str")
-    return f"{total_pay}"
-  except:
+  def show_error(error: BaseException) -> None:
     messagebox.showerror("Error", "Invalid year/month")
-    root.update_idletasks()
-    return "---"
+    on_done("---")
+  
+  service.submit("monthly_pay", BaitoManage.get_monthly_pay, f"{year}-{int(month):02d}", "str",
+                 on_done=lambda total_pay: on_done(f"{total_pay}"), on_error=show_error)
 
-def get_yearly_pay(root: tk.Tk, year: str) -> str:
+def get_yearly_pay(root: tk.Tk, year: str, on_done: Callable[[str], None]) -> None:
   """
-  Get the total pay for the year.
+  Get the total pay for the year in the background.
   Called when the user clicks the "Get Paying" button or presses the Enter key
 
   Args:
       root (tk.Tk): The root window.
       year (str): year in "yyyy" format.
-
-  Returns:
-      str: The total pay for the year.
+      on_done (Callable[[str], None]): Called with the total pay for the year, or "---" on error.
   """
-  total_pay = BaitoManage.get_yearly_pay(year, returntype="str")
-  return f"{total_pay}"
-  try:
-    total_pay = BaitoManage.get_yearly_pay(root, year, returntype="str")
-    return f"{total_pay}"
-  except:
+  def show_error(error: BaseException) -> None:
     messagebox.showerror("Error", "Invalid year")
-    root.update_idletasks()
-    return "---"
-
-def get_workdays(root: tk.Tk, year: str, month: str) -> list[str]:
-  """
-  Get the workdays for the month.
-
-  Args:
-      root (tk.Tk): The root window.
-      year (str): year in "yyyy" format.
-      month (str): month in "mm" format.
-
-  Returns:
-      list[str]: The workdays for the month in yyyy-mm-dd format.
-  """
-  try:
-    workdays = BaitoManage.get_workdays_list(year, month)
-    return workdays
-  except:
-    messagebox.showerror("Error", "Invalid year/month")
-    root.update_idletasks()
-    return []
+    on_done("---")
+  
+  service.submit("yearly_pay", BaitoManage.get_yearly_pay, year, "str",
+                 on_done=lambda total_pay: on_done(f"{total_pay}"), on_error=show_error)
 
-def get_workhours(root: tk.Tk, year: str, month: str) -> None:
+def get_workday_details(root: tk.Tk, start_year_month: str, end_year_month: str,
+                        on_done: Callable[[list[tuple[str, str, str, float, float]]], None]) -> None:
   """
-  Get the workhours for the month.
+  Get the date, start time, end time, workhours and daily pay of every workday in the range in the background.
   Called when the user presses the Enter key.
 
   Args:
       root (tk.Tk): The root window.
-      year (str): year in "yyyy" format.
-      month (str): month in "mm" format.
+      start_year_month (str): first month in "yyyy-mm" format.
+      end_year_month (str): last month in "yyyy-mm" format.
+      on_done (Callable[[list[tuple[str, str, str, float, float]]], None]): Called with the workdays in the range.
   """
-  workhours = BaitoManage.get_workhours_list(str(year), str(month))
-  if workhours:
-    print(f"Workdays for {year}-{month}:")
-    for hours in workhours:
-      print(hours)
-    return workhours
-  else:
-    print(f"No workdays for {year}-{month}")
-    return []
+  def show_error(error: BaseException) -> None:
+    messagebox.showerror("Error", "Invalid year/month")
+    on_done([])
+  
+  def print_workdays(details: list[tuple[str, str, str, float, float]]) -> None:
+    if not details:
+      log_event("no_workdays", start_year_month=start_year_month, end_year_month=end_year_month)
+    on_done(details)
+  
+  service.submit("workday_details", BaitoManage.get_workday_details, start_year_month, end_year_month,
+                 on_done=print_workdays, on_error=show_error)
     
 def setup_add_tab(root: tk.Tk, frame: tk.Frame) -> None:
   """
@@ -155,6 +173,7 @@ def setup_add_tab(root: tk.Tk, frame: tk.Frame) -> None:
       root (tk.Tk): The root window.
       frame (tk.Frame): The frame to add the widgets to.
   """
+  from tkcalendar import Calendar
   year, month = list(map(lambda x: int(x), get_current_date().split("-")))
   cal = Calendar(frame, 
                  selectmode = 'day',
@@ -173,58 +192,49 @@ def setup_add_tab(root: tk.Tk, frame: tk.Frame) -> None:
                  weekendforeground="red",
                  selectforeground="blue")
   cal.pack(padx=10, pady=(20, 0), fill="both")
-  workdays = get_workdays(root, str(year), f"{month:02d}")
-  workdays_set = set()
-  if workdays:
-    workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-    for day in workdays_set:
-      try:
-          cal.calevent_create(date(year, month, int(day)), 'Workday', 'workday')
-      except ValueError:
-          pass
-    cal.tag_config('workday', background='grey', foreground='lightgrey')
-  
-  def on_month_change(event):
-    cal.calevent_remove('nonworkday')
+  cal.tag_config('workday', background='grey', foreground='lightgrey')
+  events = {}
+  
+  def show_workdays(year: int, month: int, bitmap: int) -> None:
+    if (month, year) != cal.get_displayed_month():
+      return
+    update_calendar_events(cal, events, {date(year, month, day) for day in iter_days(bitmap)}, 'Workday', 'workday')
+  
+  @timed("gui.calendar_month_change")
+  def on_month_change(event=None):
     new_month, new_year = cal.get_displayed_month()
-    workdays = get_workdays(root, str(new_year), f"{new_month:02d}")
-    if workdays:
-      workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-
-      for day in workdays_set:
-          try:
-              cal.calevent_create(date(new_year, new_month, day), 'Workday', 'workday')
-          except ValueError:
-              pass
+    workday_cache.get(new_year, new_month, lambda bitmap: show_workdays(new_year, new_month, bitmap))
 
+  on_month_change()
   cal.bind("<<CalendarMonthChanged>>", on_month_change)
+  workday_cache.subscribe(show_workdays)
   
   def on_date_selected(event):
     selected_date = cal.get_date()
     selected_date_obj = datetime.strptime(selected_date, DATE_FORMAT).day
     new_month, new_year = cal.get_displayed_month()
-    workdays = get_workdays(root, str(new_year), f"{new_month:02d}")
-    if workdays:
-      workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-      if selected_date_obj in workdays_set:
-          print("Selection disabled for:", selected_date)
+    
+    def check_selection(bitmap: int) -> None:
+      if bitmap >> selected_date_obj & 1 and cal.get_date() == selected_date:
+          log_event("selection_disabled", date=selected_date)
           cal.selection_clear()
+    
+    workday_cache.get(new_year, new_month, check_selection)
 
   cal.bind("<<CalendarSelected>>", on_date_selected)
   
   time_frame = tk.LabelFrame(frame, text="Working Hours", padx=10, pady=10)
   time_frame.pack(padx=10, pady=(0, 10), fill="x")
   
-  minutes_tuple = tuple(range(0, 60, config.get_pay_interval_minutes()))
+  minutes_tuple = tuple(range(0, 60, config.pay_interval_minutes))
   minutes_tuple = tuple(map(lambda x: f"{x:02d}", minutes_tuple))
   
   start_time_frame = tk.Frame(time_frame)
   start_time_frame.grid(row=0, column=0)
   tk.Label(start_time_frame, text="Start Time:").grid(row=0, column=0, padx=5, pady=5)
   
-  default_start_time = list(map(int, config.get_default_start_time().split(":")))
-  start_hour = tk.IntVar(value=default_start_time[0])
-  start_minute = tk.IntVar(value=default_start_time[1])
+  start_hour = tk.IntVar(value=config.default_start_time.hour)
+  start_minute = tk.IntVar(value=config.default_start_time.minute)
   
   start_hour_box = tk.Spinbox(start_time_frame, width=2, from_=0, to=23, textvariable=start_hour)
   start_hour_box.grid(row=0, column=1, padx=0, pady=5)
@@ -239,9 +249,8 @@ def setup_add_tab(root: tk.Tk, frame: tk.Frame) -> None:
   end_time_frame.grid(row=1, column=0)
   tk.Label(end_time_frame, text="End Time:").grid(row=1, column=0, padx=(5, 11), pady=5)
   
-  default_end_time = list(map(int, config.get_default_end_time().split(":")))
-  end_hour = tk.IntVar(value=default_end_time[0])
-  end_minute = tk.IntVar(value=default_end_time[1])
+  end_hour = tk.IntVar(value=config.default_end_time.hour)
+  end_minute = tk.IntVar(value=config.default_end_time.minute)
   
   end_hour_box = tk.Spinbox(end_time_frame, width=2, from_=0, to=23, textvariable=end_hour)
   end_hour_box.grid(row=1, column=1, padx=0, pady=5)
@@ -252,15 +261,15 @@ def setup_add_tab(root: tk.Tk, frame: tk.Frame) -> None:
   end_minute_box.grid(row=1, column=3, padx=0, pady=5)
   
   def reset_time():
-    start_hour.set(f"{default_start_time[0]:02d}")
-    start_minute.set(f"{default_start_time[1]:02d}")
-    end_hour.set(f"{default_end_time[0]:02d}")
-    end_minute.set(f"{default_end_time[1]:02d}")
+    start_hour.set(f"{config.default_start_time.hour:02d}")
+    start_minute.set(f"{config.default_start_time.minute:02d}")
+    end_hour.set(f"{config.default_end_time.hour:02d}")
+    end_minute.set(f"{config.default_end_time.minute:02d}")
   
+  @timed("gui.add_workday")
   def on_enter(event=None):
     add_workday(root, cal.get_date(), f"{start_hour_box.get()}:{start_minute_box.get()}", f"{end_hour_box.get()}:{end_minute_box.get()}")
     cal.selection_clear()
-    on_month_change(event)
     reset_time()
     
     
@@ -288,7 +297,7 @@ def setup_delete_tab(root: tk.Tk, frame: tk.Frame) -> None:
       root (tk.Tk): The root window.
       frame (tk.Frame): The frame to add the widgets to.
   """
-  all_days = set(range(1, 32))
+  from tkcalendar import Calendar
   year, month = list(map(lambda x: int(x), get_current_date().split("-")))
   cal = Calendar(frame, 
                  selectmode = 'day',
@@ -307,57 +316,43 @@ def setup_delete_tab(root: tk.Tk, frame: tk.Frame) -> None:
                  weekendforeground="red",
                  selectforeground="blue")
   cal.pack(padx=10, pady=(20, 0), fill="both")
+  cal.tag_config('nonworkday', background='grey', foreground='lightgrey')
+  events = {}
   
-  workdays = get_workdays(root, str(year), f"{month:02d}")
-
-  if workdays:
-    workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-    non_workdays = all_days - workdays_set
-
-    for day in non_workdays:
-        try:
-            cal.calevent_create(date(year, month, day), 'NonWorkday', 'nonworkday')
-        except ValueError:
-            pass
-
-    cal.tag_config('nonworkday', background='grey', foreground='lightgrey')
+  def show_non_workdays(year: int, month: int, bitmap: int) -> None:
+    if (month, year) != cal.get_displayed_month():
+      return
+    days_in_month = monthrange(year, month)[1]
+    non_workdays = {date(year, month, day) for day in range(1, days_in_month + 1) if not bitmap >> day & 1}
+    update_calendar_events(cal, events, non_workdays, 'NonWorkday', 'nonworkday')
   
-  def on_month_change(event):
-    cal.calevent_remove('nonworkday')
+  @timed("gui.calendar_month_change")
+  def on_month_change(event=None):
     new_month, new_year = cal.get_displayed_month()
-    workdays = get_workdays(root, str(new_year), f"{new_month:02d}")
-    if workdays:
-      workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-      non_workdays = all_days - workdays_set
-    else:
-      non_workdays = all_days
-
-    for day in non_workdays:
-          try:
-              cal.calevent_create(date(new_year, new_month, day), 'NonWorkday', 'nonworkday')
-          except ValueError:
-              pass
+    workday_cache.get(new_year, new_month, lambda bitmap: show_non_workdays(new_year, new_month, bitmap))
 
+  on_month_change()
   cal.bind("<<CalendarMonthChanged>>", on_month_change)
+  workday_cache.subscribe(show_non_workdays)
   
   def on_date_selected(event):
     selected_date = cal.get_date()
     selected_date_obj = datetime.strptime(selected_date, DATE_FORMAT).day
     new_month, new_year = cal.get_displayed_month()
-    workdays = get_workdays(root, str(new_year), f"{new_month:02d}")
-    if workdays:
-      workdays_set = set(datetime.strptime(day, DATE_FORMAT).day for day in workdays)
-      non_workdays = all_days - workdays_set
-      if selected_date_obj in non_workdays:
-          print("Selection disabled for:", selected_date)
+    
+    def check_selection(bitmap: int) -> None:
+      if not bitmap >> selected_date_obj & 1 and cal.get_date() == selected_date:
+          log_event("selection_disabled", date=selected_date)
           cal.selection_clear()
+    
+    workday_cache.get(new_year, new_month, check_selection)
 
   cal.bind("<<CalendarSelected>>", on_date_selected)
   
+  @timed("gui.remove_workday")
   def on_enter(event=None):
     remove_workday(root, cal.get_date())
     cal.selection_clear()
-    on_month_change(event)
   
   tk.Button(frame,
             text="Delete Workday",
@@ -438,9 +433,10 @@ def setup_paying_tab(root: tk.Tk, frame: tk.Frame) -> None:
     total_paying = tk.Label(pay_frame, text="---", font=("Arial", 14, "bold"))
     total_paying.pack(side="left", padx=5, pady=5)
     
+    @timed("gui.monthly_pay")
     def on_enter(event=None):
-      print(int(root.geometry().split("x")[0]) - date_frame.winfo_width())
-      total_paying.config(text=get_monthly_pay(root, year_box.get(), month_box.get()))
+      total_paying.config(text="...")
+      get_monthly_pay(root, year_box.get(), month_box.get(), lambda text: total_paying.config(text=text))
       
       
     tk.Button(tab_monthly,
@@ -499,8 +495,10 @@ def setup_paying_tab(root: tk.Tk, frame: tk.Frame) -> None:
     pay_frame.grid_columnconfigure(3, weight=2)
     #endregion
 
+    @timed("gui.yearly_pay")
     def on_enter(event=None):
-      total_paying.config(text=get_yearly_pay(root, year_box.get()))
+      total_paying.config(text="...")
+      get_yearly_pay(root, year_box.get(), lambda text: total_paying.config(text=text))
 
     tk.Label(pay_frame, text="Total Paying", font=("Arial", 14, "bold")).grid(row=0, column=0, padx=5, pady=5, sticky="e")
     total_paying = tk.Label(pay_frame, text="---", font=("Arial", 14, "bold"))
@@ -546,7 +544,7 @@ def setup_paying_tab(root: tk.Tk, frame: tk.Frame) -> None:
     else:
       tab_yearly.focus_set()
       
-  root.slaves()[0].bind("<<NotebookTabChanged>>", on_tab_change)
+  root.slaves()[0].bind("<<NotebookTabChanged>>", on_tab_change, add="+")
   
   
 def setup_view_tab(root: tk.Tk, frame: tk.Frame) -> None:
@@ -596,34 +594,111 @@ def setup_view_tab(root: tk.Tk, frame: tk.Frame) -> None:
                          width=5)
   month_box.pack(side="left", padx=5, pady=5)
   
-  workhour_canvas = tk.Canvas(frame, bg="white", width=500, height=300)
-  workhour_canvas.pack(padx=10, pady=10, fill="x")
-  
-  tk.Label(workhour_canvas, text="Date", font=("Arial", 14, "bold"), bg="white").grid(row=0, column=0, padx=5, pady=5)
-  tk.Label(workhour_canvas, text="Start Time", font=("Arial", 14, "bold"), bg="white").grid(row=0, column=1, padx=5, pady=5)
-  tk.Label(workhour_canvas, text="End Time", font=("Arial", 14, "bold"), bg="white").grid(row=0, column=2, padx=5, pady=5)
-  
+  whole_year = tk.BooleanVar(value=False)
+  tk.Checkbutton(date_frame, text="Whole year", variable=whole_year, font=("Arial", 12)).pack(side="left", padx=5, pady=5)
+  
+  # a single Treeview only draws the visible rows, so the widget count stays the same for any range
+  table_frame = tk.Frame(frame)
+  table_frame.pack(padx=10, pady=(10, 0), fill="both", expand=True)
+  columns = ("date", "start_time", "end_time", "hours", "pay")
+  table = ttk.Treeview(table_frame, columns=columns, show="headings", height=12)
+  for column, heading, width in zip(columns, ("Date", "Start Time", "End Time", "Hours", "Pay"), (110, 90, 90, 70, 90)):
+    table.heading(column, text=heading)
+    table.column(column, width=width, anchor="center")
+  scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=table.yview)
+  table.configure(yscrollcommand=scrollbar.set)
+  table.pack(side="left", fill="both", expand=True)
+  scrollbar.pack(side="right", fill="y")
+  
+  total_label = tk.Label(frame, text="", font=("Arial", 14, "bold"))
+  total_label.pack(padx=10, pady=(5, 10))
+  
+  def show_workhours(details: list[tuple[str, str, str, float, float]]) -> None:
+    table.delete(*table.get_children())
+    for workday, start_time, end_time, hours, pay in details:
+      table.insert("", "end", values=(workday, start_time, end_time, f"{hours:g}", thousands_separators(int(pay))))
+    total_hours = sum(row[3] for row in details)
+    total_pay = sum(row[4] for row in details)
+    total_label.config(text=f"{len(details)} days, {total_hours:g} hours, {thousands_separators(int(total_pay))} yen")
+  
+  @timed("gui.view_workdays")
   def on_enter(event=None):
-    workhours = get_workhours(root, year_box.get(), month_box.get())
-    workdays = get_workdays(root, year_box.get(), month_box.get())
-    i = 0
-    for i, workday in enumerate(workdays):
-      tk.Label(workhour_canvas, text=workday, font=("Arial", 14, "bold"), bg="white").grid(row=i+1, column=0, padx=5, pady=5)
-      tk.Label(workhour_canvas, text=workhours[i][0], font=("Arial", 14, "bold"), bg="white").grid(row=i+1, column=1, padx=5, pady=5)
-      tk.Label(workhour_canvas, text=workhours[i][1], font=("Arial", 14, "bold"), bg="white").grid(row=i+1, column=2, padx=5, pady=5)
-    scrollbar = tk.Scrollbar(workhour_canvas, orient="vertical", command=workhour_canvas.yview)
-    scrollbar.grid(row=0, column=3, sticky="ns", rowspan=i+1)
-    workhour_canvas.config(yscrollcommand=scrollbar.set)
+    year, month = year_box.get(), int(month_box.get())
+    if whole_year.get():
+      start_year_month, end_year_month = f"{year}-01", f"{year}-12"
+    else:
+      start_year_month = end_year_month = f"{year}-{month:02d}"
+    total_label.config(text="...")
+    get_workday_details(root, start_year_month, end_year_month, show_workhours)
   
   frame.bind('<Return>', lambda event: on_enter(event))
   
   
 
-def main():
+def enable_debug(root: tk.Tk) -> None:
+  """
+  Print debug information from Tk event hooks instead of polling the window.
+  Focus changes and exceptions raised in callbacks are printed as they happen.
+
+  Args:
+      root (tk.Tk): The root window.
+  """
+  def on_focus_in(event: tk.Event) -> None:
+    print(f"Focus: {event.widget}")
+
+  def report_callback_exception(exc_type, exc_value, exc_traceback) -> None:
+    traceback.print_exception(exc_type, exc_value, exc_traceback)
+
+  root.bind_all("<FocusIn>", on_focus_in, add="+")
+  root.report_callback_exception = report_callback_exception
+
+def setup_busy_indicator(root: tk.Tk) -> Callable[[bool], None]:
+  """
+  Setup the indicator shown while the background service is working.
+  The indicator is placed (not packed) so that it does not change root.slaves().
+
+  Args:
+      root (tk.Tk): The root window.
+
+  Returns:
+      Callable[[bool], None]: Shows the indicator when called with True and hides it with False.
+  """
+  progressbar = ttk.Progressbar(root, mode="indeterminate", length=80)
+  
+  def on_busy_change(busy: bool) -> None:
+    if busy:
+      progressbar.place(relx=1.0, x=-5, y=3, anchor="ne")
+      progressbar.lift()
+      progressbar.start(15)
+      root.config(cursor="watch")
+    else:
+      progressbar.stop()
+      progressbar.place_forget()
+      root.config(cursor="")
+  
+  return on_busy_change
+
+def build_window() -> tk.Tk:
+  """
+  Build the main window. Only the first tab is built here; the others are built when first selected.
+
+  Returns:
+      tk.Tk: The root window, ready for mainloop.
+  """
+  global service, workday_cache
   root = tk.Tk()
   root.title(u"Baito")
   root.geometry("550x450")
   root.resizable(False, False)
+  
+  service = BackgroundService(root, on_busy_change=setup_busy_indicator(root))
+  workday_cache = WorkdayCache(service)
+  
+  def on_close() -> None:
+    service.shutdown()
+    root.destroy()
+  
+  root.protocol("WM_DELETE_WINDOW", on_close)
 
   notebook = ttk.Notebook(root)
   notebook.pack(expand=True, fill='both')
@@ -638,29 +713,29 @@ def main():
   notebook.add(tab_paying, text='View Paying')
   notebook.add(tab_view, text='View Workhours')
 
-  setup_add_tab(root, tab_add)
-  setup_delete_tab(root, tab_delete)
-  setup_paying_tab(root, tab_paying)
-  setup_view_tab(root, tab_view)
+  tab_setups = {str(tab_add): setup_add_tab, str(tab_delete): setup_delete_tab,
+                str(tab_paying): setup_paying_tab, str(tab_view): setup_view_tab}
+  tabs = {str(tab): tab for tab in (tab_add, tab_delete, tab_paying, tab_view)}
+  
+  @timed("gui.tab_changed")
+  def on_tab_changed(event=None) -> None:
+    selected = notebook.select()
+    setup_tab = tab_setups.pop(selected, None)
+    if setup_tab is not None:
+      setup_tab(root, tabs[selected])
+  
+  on_tab_changed()
+  notebook.bind("<<NotebookTabChanged>>", on_tab_changed)
   
   tab_add.focus_set()
   
-  debug = True
-  
-  if debug:
-    counter = 0
-    while True:
-        try:
-          root.update_idletasks()
-          root.update()
-          if counter > 10000:
-            print(root.focus_get())
-            counter = 0
-          counter += 1
-        except tk.TclError:
-          break
-  else:
-    root.mainloop()
+  if config.gui_debug:
+    enable_debug(root)
+  
+  return root
+
+def main():
+  build_window().mainloop()
 
 if __name__ == "__main__":
   main()
@@ -0,0 +1,24 @@
+"""
+Serves the worktime data as a local HTTP JSON API (see module/api_server.py for the endpoints).
+
+Example:
+    python Baito_server.py --port 8080
+    curl -X POST localhost:8080/shifts -d '{"date": "2024-07-01", "start_time": "17:00", "end_time": "22:00"}'
+    curl localhost:8080/pay/monthly/2024-07
+"""
+import argparse
+from module.api_server import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the worktime data as a local HTTP JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on. Defaults to 127.0.0.1.")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on. Defaults to 8080.")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="number of requests handled at the same time. Defaults to 8.")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.threads)
+
+
+if __name__ == "__main__":
+    main()
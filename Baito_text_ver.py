@@ -1,19 +1,7 @@
-from datetime import datetime
-from module.shift_manage import BaitoManage, get_year_month, get_day, get_start_time, get_end_time
-from module.baito_configuration import BaitoConfiguration
-
-config = BaitoConfiguration()
-
-FILE_FORMAT = config.get_file_format()
-COLUMNS = config.get_columns()
-FILE_DATE_FORMAT = config.get_file_date_format()
-DATE_FORMAT = config.get_date_format()
-SHIFT_FORMAT = config.get_shift_format()
-TIME_BARRIER = config.get_time_barrier()
-
-WEEKDAY_WAGE = config.get_weekday_wage()
-WEEKEND_WAGE = config.get_weekend_wage()
-TRANSIT_FEE = config.get_transit_fee()
+from module.shift_manage import BaitoManage
+from module.data_entry import get_year_month, get_day, get_start_time, get_end_time
+from module.baito_configuration import reload_config
+from module.utils import get_current_date
 
 def add() -> None:
     """
@@ -46,7 +34,7 @@ def monthly_pay():
     """
     year_month = input("Enter desired date of viewing (yyyy-mm) or blank for current month: ")
     if not year_month:
-        year_month = datetime.today().strftime(BaitoManage.FILE_DATE_FORMAT)
+        year_month = get_current_date()
     valid = False
     fail_count = 0
     while not valid:
@@ -63,6 +51,11 @@ def monthly_pay():
 
 def main():
     while True:
+        # wages changed in the configuration file apply from the next choice on
+        try:
+            reload_config()
+        except ValueError as error:
+            print(f"\nConfiguration not reloaded: {error}")
         print("1. Add new work day.\n"
               "2. Remove work day.\n"
               "3. View total paying.\n"
@@ -0,0 +1,45 @@
+"""
+Imports or exports many work days at once, as csv or JSON Lines.
+An import reads and writes each month once, however many rows it has.
+
+Example:
+    python Baito_transfer.py import timesheet_2024.csv
+    python Baito_transfer.py export 2024-01 2024-12 --output worktime_2024.jsonl
+    cat timesheet.jsonl | python Baito_transfer.py import - --format jsonl --worker tanaka
+"""
+import argparse
+from module.shift_manage import BaitoManage
+from module.shift_transfer import FORMATS
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--worker", help="name of the worker. The default worker if omitted.")
+    common.add_argument("--format", choices=FORMATS, dest="file_format",
+                        help="file format. Detected from the file extension if omitted (csv for stdin/stdout).")
+    parser = argparse.ArgumentParser(description="Import or export work days as csv or JSON Lines.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", parents=[common], help="add the work days of a file")
+    import_parser.add_argument("path", help="file to import, or - for stdin")
+    import_parser.add_argument("--replace", action="store_true",
+                               help="replace existing work days of the same dates instead of skipping them")
+
+    export_parser = subparsers.add_parser("export", parents=[common], help="write the work days of a range of months")
+    export_parser.add_argument("start", help="first month in yyyy-mm format")
+    export_parser.add_argument("end", help="last month in yyyy-mm format")
+    export_parser.add_argument("--output", default="-", help="file to write, or - for stdout (default)")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        report = BaitoManage.import_entries(args.path, args.file_format, args.worker, args.replace)
+        for line_number, date, reason in report["rejected"]:
+            print(f"line {line_number}: {date or '(no date)'}: {reason}")
+        raise SystemExit(1 if report["rejected"] else 0)
+    count = BaitoManage.export_entries(args.output, args.start, args.end, args.file_format, args.worker)
+    if args.output != "-":
+        print(f"{count} work day(s) written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
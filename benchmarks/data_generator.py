@@ -0,0 +1,107 @@
+"""
+Synthetic worktime data for benchmarks.
+Writes N years x M workers of worktime_*.csv files in the layout of the csv storage: the default worker in
+worktime_info/ and every other worker in worktime_info/<worker>/. The data only depends on the seed, so the
+same arguments always give the same files.
+
+Example:
+    python -m benchmarks.data_generator /tmp/baito_data --years 5 --workers 10
+"""
+import argparse
+import calendar
+import csv
+import os
+import random
+
+COLUMNS = ("date", "start_time", "end_time")
+DATA_DIRECTORY = "worktime_info"
+FILE_FORMAT = "worktime_"
+
+# (start time, end time) of the shifts, including one that ends on the next day
+SHIFT_PATTERNS = [("17:00", "22:00"), ("09:00", "17:00"), ("18:00", "23:30"), ("10:00", "15:00"),
+                  ("22:00", "05:00"), ("17:15", "22:45")]
+
+
+def get_worker_name(index: int) -> str:
+    """
+    Get the name of the index-th generated worker. Index 0 is the default worker.
+
+    Args:
+        index (int): index of the worker.
+
+    Returns:
+        str: name of the worker, "" for the default worker.
+    """
+    return f"worker{index:03d}" if index else ""
+
+
+def generate_month(rng: random.Random, year: int, month: int, workday_ratio: float) -> list[tuple[str, str, str]]:
+    """
+    Generate the shifts of a month. Shifts never overlap, as every pattern starts after the next-day end of
+    the overnight one.
+
+    Args:
+        rng (random.Random): random number generator.
+        year (int): year.
+        month (int): month (1-12).
+        workday_ratio (float): share of the days that are workdays.
+
+    Returns:
+        list[tuple[str, str, str]]: date, start time and end time of each shift, in order of date.
+    """
+    rows = []
+    for day in range(1, calendar.monthrange(year, month)[1] + 1):
+        if rng.random() < workday_ratio:
+            start_time, end_time = rng.choice(SHIFT_PATTERNS)
+            rows.append((f"{year}-{month:02d}-{day:02d}", start_time, end_time))
+    return rows
+
+
+def generate_data(directory: str, years: int, workers: int, start_year: int = 2020, workday_ratio: float = 0.6,
+                  seed: int = 0) -> int:
+    """
+    Write the csv files of every month of every worker.
+
+    Args:
+        directory (str): directory to write worktime_info/ into. Created if needed.
+        years (int): number of years, starting with start_year.
+        workers (int): number of workers, including the default worker.
+        start_year (int, optional): first year. Defaults to 2020.
+        workday_ratio (float, optional): share of the days that are workdays. Defaults to 0.6.
+        seed (int, optional): seed of the random data. Defaults to 0.
+
+    Returns:
+        int: number of shifts written.
+    """
+    rng = random.Random(seed)
+    count = 0
+    for index in range(workers):
+        worker_directory = os.path.join(directory, DATA_DIRECTORY, get_worker_name(index))
+        os.makedirs(worker_directory, exist_ok=True)
+        for year in range(start_year, start_year + years):
+            for month in range(1, 13):
+                rows = generate_month(rng, year, month, workday_ratio)
+                path = os.path.join(worker_directory, f"{FILE_FORMAT}{year}-{month:02d}.csv")
+                with open(path, "w", newline="") as csv_file:
+                    writer = csv.writer(csv_file, lineterminator="\n")
+                    writer.writerow(COLUMNS)
+                    writer.writerows(rows)
+                count += len(rows)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic worktime csv files for benchmarks.")
+    parser.add_argument("directory", help="directory to write worktime_info/ into")
+    parser.add_argument("--years", type=int, default=1, help="number of years. Defaults to 1.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of workers, including the default worker. Defaults to 1.")
+    parser.add_argument("--start-year", type=int, default=2020, help="first year. Defaults to 2020.")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random data. Defaults to 0.")
+    args = parser.parse_args()
+    count = generate_data(args.directory, args.years, args.workers, args.start_year, seed=args.seed)
+    print(f"{count} shifts written to {os.path.join(args.directory, DATA_DIRECTORY)}")
+
+
+if __name__ == "__main__":
+    main()
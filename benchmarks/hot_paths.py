@@ -0,0 +1,230 @@
+"""
+Benchmark of the storage, payroll and GUI-refresh hot paths at several data sizes.
+For every size, synthetic data (see data_generator) is written to a temporary directory and measured in a fresh
+interpreter working in that directory, so the real worktime_info is never touched and no size warms another.
+
+Measured (median/min/max over --repeat calls, in milliseconds):
+    add_entry, remove_entry: removing an existing work day and adding it back.
+    get_monthly_pay, get_yearly_pay, get_workdays_list, workers_pay_summary: "cold" right after the cached data
+        was dropped (read from disk), "warm" when it is served from memory.
+    month_change: the calendar month-change handler (WorkdayCache.get), cold and warm.
+
+Example:
+    python -m benchmarks.hot_paths --sizes 1x1,5x5,10x20 --output before.json
+    python -m benchmarks.hot_paths --sizes 1x1,5x5,10x20 --baseline before.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+from benchmarks.data_generator import generate_data
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "1x1,5x5,10x20"
+
+
+class _ImmediateService:
+    """
+    Runs requests on the calling thread, in place of the Tk BackgroundService of the GUI.
+    """
+
+    def submit(self, key: str | None, function: Callable, *args, on_done: Callable | None = None,
+               on_error: Callable | None = None) -> None:
+        result = function(*args)
+        if on_done is not None:
+            on_done(result)
+
+
+def _summarize(seconds: list[float]) -> dict:
+    milliseconds = [second * 1000 for second in seconds]
+    return {"median_ms": statistics.median(milliseconds), "min_ms": min(milliseconds), "max_ms": max(milliseconds)}
+
+
+def _time_calls(function: Callable, calls: list[tuple], setup: Callable | None = None) -> dict:
+    """
+    Time function once per arguments in calls, running setup with the same arguments untimed before each call.
+    """
+    seconds = []
+    for args in calls:
+        if setup is not None:
+            setup(*args)
+        start = time.perf_counter()
+        function(*args)
+        seconds.append(time.perf_counter() - start)
+    return _summarize(seconds)
+
+
+def measure(start_year: int, years: int, repeat: int) -> dict:
+    """
+    Measure the hot paths on the data of the current directory. Runs in the fresh interpreter of one size.
+
+    Args:
+        start_year (int): first year of the data.
+        years (int): number of years of the data.
+        repeat (int): number of calls per measurement.
+
+    Returns:
+        dict: timings of each measurement.
+    """
+    # imported here, so that the configuration and data of the current directory are used
+    import contextlib
+    import io
+    from module.shift_manage import BaitoManage
+    from module.shift_store import get_shift_store
+    from module.storage import DEFAULT_WORKER, list_workers
+    from module.workday_cache import WorkdayCache
+
+    rng = random.Random(0)
+    store = get_shift_store()
+    all_years = [str(year) for year in range(start_year, start_year + years)]
+    year_months = [f"{year}-{month:02d}" for year in all_years for month in range(1, 13)]
+    first_year_month, last_year_month = year_months[0], year_months[-1]
+    months = [tuple(rng.choice(year_months).split("-")) for _ in range(repeat)]
+    rows = [tuple(row) for year_month in year_months for row in store.load(year_month).rows()]
+    dates = rng.sample(rows, min(repeat, len(rows)))
+    stores = [get_shift_store(worker) for worker in [DEFAULT_WORKER] + list_workers()]
+
+    def drop_month(year: str, month: str) -> None:
+        store.invalidate(f"{year}-{month}")
+
+    def drop_all(*args) -> None:
+        for worker_store in stores:
+            worker_store.invalidate()
+
+    service = _ImmediateService()
+    warm_cache = WorkdayCache(service)
+    caches = {}
+
+    def new_cache(year: str, month: str) -> None:
+        drop_month(year, month)
+        caches["cold"] = WorkdayCache(service)
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        results["remove_entry"] = _time_calls(
+            lambda date, start_time, end_time: BaitoManage.remove_entry(date[:7], date[8:]), dates)
+        results["add_entry"] = _time_calls(
+            lambda date, start_time, end_time: BaitoManage.add_entry(date[:7], date[8:], start_time, end_time), dates)
+
+        def monthly_pay(year: str, month: str) -> None:
+            BaitoManage.get_monthly_pay(f"{year}-{month}")
+
+        results["get_monthly_pay_cold"] = _time_calls(monthly_pay, months, drop_month)
+        results["get_monthly_pay_warm"] = _time_calls(monthly_pay, months)
+
+        yearly_calls = [(rng.choice(all_years),) for _ in range(repeat)]
+        results["get_yearly_pay_cold"] = _time_calls(BaitoManage.get_yearly_pay, yearly_calls, drop_all)
+        results["get_yearly_pay_warm"] = _time_calls(BaitoManage.get_yearly_pay, yearly_calls)
+
+        results["get_workdays_list_cold"] = _time_calls(BaitoManage.get_workdays_list, months, drop_month)
+        results["get_workdays_list_warm"] = _time_calls(BaitoManage.get_workdays_list, months)
+
+        results["month_change_cold"] = _time_calls(
+            lambda year, month: caches["cold"].get(int(year), int(month), lambda bitmap: None), months, new_cache)
+        for year, month in months:
+            warm_cache.get(int(year), int(month), lambda bitmap: None)
+        results["month_change_warm"] = _time_calls(
+            lambda year, month: warm_cache.get(int(year), int(month), lambda bitmap: None), months)
+
+        summary_calls = [(first_year_month, last_year_month)] * max(1, repeat // 10)
+        results["workers_pay_summary_cold"] = _time_calls(BaitoManage.get_workers_pay_summary, summary_calls, drop_all)
+        results["workers_pay_summary_warm"] = _time_calls(BaitoManage.get_workers_pay_summary, summary_calls)
+    return results
+
+
+def benchmark_size(years: int, workers: int, repeat: int, start_year: int = 2020) -> dict:
+    """
+    Generate the data of one size in a temporary directory and measure it in a fresh interpreter.
+
+    Args:
+        years (int): number of years.
+        workers (int): number of workers, including the default worker.
+        repeat (int): number of calls per measurement.
+        start_year (int, optional): first year of the data. Defaults to 2020.
+
+    Returns:
+        dict: size of the data and timings of each measurement.
+    """
+    with tempfile.TemporaryDirectory(prefix="baito-benchmark-") as directory:
+        shutil.copy(os.path.join(REPO_ROOT, "baito_config.env"), directory)
+        shifts = generate_data(directory, years, workers, start_year)
+        environment = dict(os.environ, STORAGE_BACKEND="csv",
+                           PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+        command = [sys.executable, "-m", "benchmarks.hot_paths", "--measure",
+                   "--start-year", str(start_year), "--years", str(years), "--repeat", str(repeat)]
+        result = subprocess.run(command, cwd=directory, env=environment, capture_output=True, text=True, check=True)
+    return {"years": years, "workers": workers, "shifts": shifts, "timings": json.loads(result.stdout)}
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """
+    Compare the median timings of two benchmark results.
+
+    Args:
+        results (dict): results of this run.
+        baseline (dict): results to compare with, e.g. of the previous commit.
+
+    Returns:
+        list[str]: one line per measurement found in both, with the ratio of this run to the baseline.
+    """
+    lines = []
+    for size, size_results in results["sizes"].items():
+        baseline_timings = baseline.get("sizes", {}).get(size, {}).get("timings", {})
+        for name, timings in size_results["timings"].items():
+            if name not in baseline_timings:
+                continue
+            before, after = baseline_timings[name]["median_ms"], timings["median_ms"]
+            ratio = after / before if before else float("inf")
+            lines.append(f"{size:>8} {name:<26} {before:10.3f} ms -> {after:10.3f} ms  x{ratio:.2f}")
+    return lines
+
+
+def _get_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+                                check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the storage, payroll and GUI-refresh hot paths.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"data sizes as YEARSxWORKERS, comma separated. Defaults to {DEFAULT_SIZES}.")
+    parser.add_argument("--repeat", type=int, default=20, help="number of calls per measurement. Defaults to 20.")
+    parser.add_argument("--output", help="JSON file to write the results to. Printed if omitted.")
+    parser.add_argument("--baseline", help="JSON file of earlier results to compare with.")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start-year", type=int, default=2020, help=argparse.SUPPRESS)
+    parser.add_argument("--years", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.start_year, args.years, args.repeat)))
+        return
+
+    results = {"python": sys.version.split()[0], "commit": _get_commit(), "repeat": args.repeat, "sizes": {}}
+    for size in args.sizes.split(","):
+        years, workers = map(int, size.lower().split("x"))
+        results["sizes"][size] = benchmark_size(years, workers, args.repeat)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report)
+    else:
+        print(report)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            print("\n".join(compare(results, json.load(baseline_file))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Startup benchmark of the entry points.
+Every measurement runs in a fresh interpreter, so imports are never served from an already warm process.
+
+Measured:
+    import: time to import each entry point module, and whether pandas got imported.
+    cli_add_remove: time of an add_entry and a remove_entry right after startup, and whether pandas got imported.
+        Runs in a temporary data directory with the configured backend, so the real work days are never touched.
+    gui_first_paint: time from importing the GUI to the first drawn window (skipped without a display).
+
+Example:
+    python -m benchmarks.startup --repeat 10 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_WORKER = "startup-benchmark"
+
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, "pandas" in sys.modules)
+"""
+
+_ADD_REMOVE_SCRIPT = """
+import sys, time, io, contextlib
+start = time.perf_counter()
+from module.shift_manage import BaitoManage
+imported = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    BaitoManage.add_entry("2000-01", "01", "17:00", "22:00", {worker!r})
+    BaitoManage.remove_entry("2000-01", "01", {worker!r})
+print(imported - start, time.perf_counter() - imported, "pandas" in sys.modules)
+"""
+
+_GUI_SCRIPT = """
+import time
+start = time.perf_counter()
+import Baito_gui_ver
+imported = time.perf_counter()
+try:
+    root = Baito_gui_ver.build_window()
+except Exception:
+    print("nan nan")
+    raise SystemExit
+root.update()
+painted = time.perf_counter()
+Baito_gui_ver.service.shutdown()
+root.destroy()
+print(imported - start, painted - start)
+"""
+
+
+def _run(script: str, directory: str | None = None, environment: dict | None = None) -> list[str]:
+    """
+    Run a script in a fresh interpreter in the given directory (the current one if omitted) and return the words
+    it printed.
+    """
+    result = subprocess.run([sys.executable, "-c", script], cwd=directory, env=environment, capture_output=True,
+                            text=True, check=True)
+    return result.stdout.split()
+
+
+def _summarize(seconds: list[float]) -> dict:
+    milliseconds = [second * 1000 for second in seconds]
+    return {"median_ms": statistics.median(milliseconds), "min_ms": min(milliseconds), "max_ms": max(milliseconds)}
+
+
+def benchmark_imports(modules: list[str], repeat: int) -> dict:
+    """
+    Measure the import time of each module.
+
+    Args:
+        modules (list[str]): modules to import, e.g. "Baito_text_ver".
+        repeat (int): number of fresh interpreters per module.
+
+    Returns:
+        dict: timings and whether pandas was imported, for each module.
+    """
+    results = {}
+    for module in modules:
+        runs = [_run(_IMPORT_SCRIPT.format(module=module)) for _ in range(repeat)]
+        results[module] = _summarize([float(seconds) for seconds, _ in runs])
+        results[module]["imports_pandas"] = runs[0][1] == "True"
+    return results
+
+
+def benchmark_cli_add_remove(repeat: int) -> dict:
+    """
+    Measure an add_entry and a remove_entry right after startup, using a throwaway worker in a temporary data
+    directory.
+
+    Args:
+        repeat (int): number of fresh interpreters.
+
+    Returns:
+        dict: import and add/remove timings, and whether pandas was imported.
+    """
+    with tempfile.TemporaryDirectory(prefix="baito-benchmark-") as directory:
+        shutil.copy(os.path.join(REPO_ROOT, "baito_config.env"), directory)
+        # SQLITE_PATH of the copied configuration is relative, so the database is created in the directory too
+        os.mkdir(os.path.join(directory, "worktime_info"))
+        environment = {name: value for name, value in os.environ.items() if name != "SQLITE_PATH"}
+        environment["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))
+        script = _ADD_REMOVE_SCRIPT.format(worker=BENCHMARK_WORKER)
+        runs = [_run(script, directory, environment) for _ in range(repeat)]
+    return {"import": _summarize([float(run[0]) for run in runs]),
+            "add_remove": _summarize([float(run[1]) for run in runs]),
+            "imports_pandas": runs[0][2] == "True"}
+
+
+def benchmark_gui_first_paint(repeat: int) -> dict | None:
+    """
+    Measure the import and first paint of the GUI.
+
+    Args:
+        repeat (int): number of fresh interpreters.
+
+    Returns:
+        dict | None: import and first paint timings, or None if no window can be opened (e.g. no display).
+    """
+    runs = []
+    for _ in range(repeat):
+        try:
+            imported, painted = map(float, _run(_GUI_SCRIPT))
+        except (subprocess.CalledProcessError, ValueError):
+            return None
+        if imported != imported:
+            return None
+        runs.append((imported, painted))
+    return {"import": _summarize([imported for imported, _ in runs]),
+            "first_paint": _summarize([painted for _, painted in runs])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the Baito entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="number of runs per measurement. Defaults to 5.")
+    parser.add_argument("--output", help="JSON file to write the results to. Printed if omitted.")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "import": benchmark_imports(["Baito_text_ver", "module.shift_manage", "Baito_gui_ver"], args.repeat),
+        "cli_add_remove": benchmark_cli_add_remove(args.repeat),
+        "gui_first_paint": benchmark_gui_first_paint(args.repeat),
+    }
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Module for serving the worktime data over a local HTTP JSON API, so that kiosks and scripts share one warm
+process (with the shift stores already in memory) instead of starting Python for every action.
+
+Endpoints (worker is an optional query parameter, the default worker if omitted):
+    GET    /workers                          names of the workers with data
+    GET    /months/yyyy-mm/workdays          dates of the work days of a month
+    GET    /months/yyyy-mm/workhours         start and end time of the work days of a month
+    GET    /pay/monthly/yyyy-mm              pay, hours and days of a month
+    GET    /pay/yearly/yyyy                  pay, hours and days of a year
+    POST   /shifts                           add a shift: {"date": "yyyy-mm-dd", "start_time": "hh:mm",
+                                             "end_time": "hh:mm", "worker": optional}
+    DELETE /shifts/yyyy-mm-dd                remove the shift of a date
+Errors are returned as {"error": message} with a 4xx status, or 500 for unexpected errors such as a full disk
+(logged with their traceback). Add and remove also return the result code of BaitoManage.add_entry /
+remove_entry as "result".
+
+Requests are handled by a fixed pool of threads. Reads are served from the process-wide shift stores
+(see shift_store), and writes to the same month are serialized by the store lock (see ShiftStore.lock),
+which also keeps them consistent with other programs writing the same files.
+"""
+from __future__ import annotations
+import json
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+from module.shift_manage import BaitoManage
+from module.storage import DEFAULT_WORKER, list_workers
+
+MAX_BODY_SIZE = 64 * 1024
+
+# status of each result code of add_entry and remove_entry
+_RESULT_STATUS = {
+    0: HTTPStatus.OK,
+    -1: HTTPStatus.BAD_REQUEST,
+    -2: HTTPStatus.CONFLICT,
+    -3: HTTPStatus.BAD_REQUEST,
+    -4: HTTPStatus.CONFLICT,
+}
+_RESULT_MESSAGES = {
+    -1: "Invalid year/month or day.",
+    -2: "Entry with the same date already exists.",
+    -3: "Invalid start/end time.",
+    -4: "Shift overlaps the entry of another date.",
+}
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+class ApiError(Exception):
+    """
+    Error returned to the client with a status code.
+    """
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _get_totals(start_year_month: str, end_year_month: str, worker: str | None) -> dict:
+    summary = BaitoManage.get_pay_summary(start_year_month, end_year_month, worker)
+    return summary["total"]
+
+
+def list_workers_route(query: dict, body: dict | None) -> tuple[HTTPStatus, dict]:
+    return HTTPStatus.OK, {"workers": [DEFAULT_WORKER] + list_workers()}
+
+
+def list_workdays_route(query: dict, body: dict | None, year_month: str) -> tuple[HTTPStatus, dict]:
+    details = BaitoManage.get_workday_details(year_month, year_month, query.get("worker"))
+    return HTTPStatus.OK, {"year_month": year_month, "workdays": [date for date, *_ in details]}
+
+
+def list_workhours_route(query: dict, body: dict | None, year_month: str) -> tuple[HTTPStatus, dict]:
+    details = BaitoManage.get_workday_details(year_month, year_month, query.get("worker"))
+    workhours = [{"date": date, "start_time": start_time, "end_time": end_time}
+                 for date, start_time, end_time, _, _ in details]
+    return HTTPStatus.OK, {"year_month": year_month, "workhours": workhours}
+
+
+def monthly_pay_route(query: dict, body: dict | None, year_month: str) -> tuple[HTTPStatus, dict]:
+    return HTTPStatus.OK, {"year_month": year_month, **_get_totals(year_month, year_month, query.get("worker"))}
+
+
+def yearly_pay_route(query: dict, body: dict | None, year: str) -> tuple[HTTPStatus, dict]:
+    return HTTPStatus.OK, {"year": year, **_get_totals(f"{year}-01", f"{year}-12", query.get("worker"))}
+
+
+def add_shift_route(query: dict, body: dict | None) -> tuple[HTTPStatus, dict]:
+    if body is None:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "A JSON body is required.")
+    worker = body.get("worker") or query.get("worker")
+    if worker is not None and not isinstance(worker, str):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "worker must be a string.")
+    date = str(body.get("date", ""))
+    # checked before add_entry, which would create the file of an invalid month
+    try:
+        valid = _DATE_PATTERN.fullmatch(date) is not None and bool(datetime.strptime(date, "%Y-%m-%d"))
+    except ValueError:
+        valid = False
+    if not valid:
+        return _RESULT_STATUS[-1], {"result": -1, "error": _RESULT_MESSAGES[-1]}
+    year, month, day = date.split("-")
+    result = BaitoManage.add_entry(f"{year}-{month}", day, str(body.get("start_time", "")),
+                                   str(body.get("end_time", "")), worker)
+    if result != 0:
+        return _RESULT_STATUS[result], {"result": result, "error": _RESULT_MESSAGES[result]}
+    return HTTPStatus.CREATED, {"result": result, "date": date}
+
+
+def remove_shift_route(query: dict, body: dict | None, year_month: str, day: str) -> tuple[HTTPStatus, dict]:
+    result = BaitoManage.remove_entry(year_month, day, query.get("worker"))
+    if result != 0:
+        return HTTPStatus.NOT_FOUND, {"result": result, "error": "No entry of this date."}
+    return HTTPStatus.OK, {"result": result, "date": f"{year_month}-{day}"}
+
+
+# (method, path pattern, handler); the groups of the pattern are passed to the handler
+ROUTES: list[tuple[str, re.Pattern, Callable[..., tuple[HTTPStatus, dict]]]] = [
+    ("GET", re.compile(r"/workers"), list_workers_route),
+    ("GET", re.compile(r"/months/(\d{4}-\d{2})/workdays"), list_workdays_route),
+    ("GET", re.compile(r"/months/(\d{4}-\d{2})/workhours"), list_workhours_route),
+    ("GET", re.compile(r"/pay/monthly/(\d{4}-\d{2})"), monthly_pay_route),
+    ("GET", re.compile(r"/pay/yearly/(\d{4})"), yearly_pay_route),
+    ("POST", re.compile(r"/shifts"), add_shift_route),
+    ("DELETE", re.compile(r"/shifts/(\d{4}-\d{2})-(\d{2})"), remove_shift_route),
+]
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Dispatches a request to its route and writes the JSON response. One connection per request (HTTP/1.0),
+    so a pool thread is never held by an idle client.
+    """
+    server_version = "BaitoAPI/1.0"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _read_body(self) -> dict | None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        if length > MAX_BODY_SIZE:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body is too large.")
+        try:
+            body = json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON.") from None
+        if not isinstance(body, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object.")
+        return body
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            path_found = False
+            for route_method, pattern, handler in ROUTES:
+                match = pattern.fullmatch(url.path.rstrip("/") or "/")
+                if match is None:
+                    continue
+                if route_method != method:
+                    path_found = True
+                    continue
+                status, response = handler(query, self._read_body(), *match.groups())
+                break
+            else:
+                if path_found:
+                    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not allowed on {url.path}.")
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+        except ApiError as error:
+            status, response = error.status, {"error": str(error)}
+        except ValueError as error:
+            # e.g. an invalid worker name
+            status, response = HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except Exception as error:
+            # e.g. an OSError of the storage; the client still gets a response
+            self.log_error("%s %s failed: %r", method, url.path, error)
+            traceback.print_exc()
+            status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Internal error: {type(error).__name__}"}
+        self._send_json(status, response)
+
+    def _send_json(self, status: HTTPStatus, response: dict) -> None:
+        data = json.dumps(response, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ApiServer(HTTPServer):
+    """
+    HTTP server that handles each request on a fixed pool of threads instead of a new thread per request.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], threads: int = 8,
+                 handler: type[BaseHTTPRequestHandler] = ApiRequestHandler):
+        super().__init__(address, handler)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="baito-api")
+
+    def process_request(self, request, client_address) -> None:
+        self._executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, threads: int = 8) -> None:
+    """
+    Serve the API until interrupted.
+
+    Args:
+        host (str, optional): address to listen on. Defaults to "127.0.0.1" (this machine only).
+        port (int, optional): port to listen on. Defaults to 8080.
+        threads (int, optional): number of requests handled at the same time. Defaults to 8.
+    """
+    with ApiServer((host, port), threads) as server:
+        print(f"Serving on http://{host}:{server.server_port} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
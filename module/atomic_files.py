@@ -0,0 +1,186 @@
+"""
+Module for writing data files safely when the program crashes or several programs (e.g. the GUI and the
+text CLI) write at the same time.
+
+Writes:
+    atomic_write: a whole file is written under a temporary name in the same directory and swapped in with
+        os.replace, so readers see either the old or the new file, never a partial one.
+    append_line: a line is appended with a single write. A line cut short by a crash is cut off by the next
+        append (see repair_tail), and readers ignore it (see read_complete_lines).
+    With FSYNC_WRITES=true (the default), data is flushed to the disk before a write returns.
+
+Locks:
+    lock_file: an exclusive advisory lock (fcntl.flock) of a lock file, held by one thread of one process at
+        a time. Writers hold the lock of a month while they read, change and write it. Readers need no lock,
+        as they never see a partial file. Without fcntl (e.g. on Windows) only the threads of this process
+        are serialized.
+"""
+from __future__ import annotations
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator
+from module.baito_configuration import get_config
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+config = get_config()
+
+FSYNC_WRITES = config.fsync_writes
+
+# size of the end of a file that is searched for the last complete line
+_TAIL_SIZE = 4096
+
+
+def _fsync_directory(directory: str) -> None:
+    # makes the rename itself durable; not supported on every platform
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w", newline: str | None = None) -> Iterator[IO]:
+    """
+    Write a whole file atomically: the file is written under a temporary name and then renamed to path.
+    Nothing is changed if an exception is raised while writing.
+
+    Args:
+        path (str): path of the file.
+        mode (str, optional): "w" or "wb". Defaults to "w".
+        newline (str | None, optional): newline argument of open, e.g. "" for csv files. Defaults to None.
+
+    Yields:
+        IO: the temporary file to write to.
+    """
+    directory = os.path.dirname(path) or "."
+    # starts with a dot, so it is never taken for a month file
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        try:
+            os.chmod(temporary_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(temporary_path, 0o644)
+        with open(descriptor, mode, newline=newline) as file:
+            yield file
+            file.flush()
+            if FSYNC_WRITES:
+                os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except FileNotFoundError:
+            pass
+        raise
+    if FSYNC_WRITES:
+        _fsync_directory(directory)
+
+
+def repair_tail(path: str) -> None:
+    """
+    Cut off a last line that was cut short by a crash while it was appended. It was never reported as written.
+
+    Args:
+        path (str): path of the file.
+    """
+    with open(path, "rb+") as file:
+        size = file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        file.seek(max(0, size - _TAIL_SIZE))
+        tail = file.read()
+        if tail.endswith(b"\n"):
+            return
+        file.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+
+
+def append_line(path: str, line: str) -> None:
+    """
+    Append a line to a file with a single write, after cutting off a partial last line if there is one.
+    The caller holds the lock of the file (see lock_file).
+
+    Args:
+        path (str): path of the file.
+        line (str): line including its line terminator.
+    """
+    repair_tail(path)
+    with open(path, "a", newline="") as file:
+        file.write(line)
+        file.flush()
+        if FSYNC_WRITES:
+            os.fsync(file.fileno())
+
+
+def read_complete_lines(file: IO[str]) -> list[str]:
+    """
+    Read the lines of a text file, leaving out a last line that was cut short by a crash while it was appended.
+
+    Args:
+        file (IO[str]): file opened for reading.
+
+    Returns:
+        list[str]: complete lines, without line terminators.
+    """
+    content = file.read()
+    if not content.endswith("\n"):
+        content = content[:content.rfind("\n") + 1]
+    return content.splitlines()
+
+
+class _HeldLock:
+    """
+    State of the lock of a single path within this process.
+    """
+    __slots__ = ("thread_lock", "file", "depth")
+
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.file: IO | None = None
+        self.depth = 0
+
+
+_held_locks: dict[str, _HeldLock] = {}
+_held_locks_lock = threading.Lock()
+
+
+@contextmanager
+def lock_file(path: str) -> Iterator[None]:
+    """
+    Hold the exclusive advisory lock of a lock file, waiting until no other thread or process holds it.
+    A thread that already holds the lock can take it again. The lock file is created if needed and never removed.
+
+    Args:
+        path (str): path of the lock file.
+    """
+    with _held_locks_lock:
+        held = _held_locks.get(path)
+        if held is None:
+            held = _held_locks[path] = _HeldLock()
+    with held.thread_lock:
+        if held.depth == 0:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            held.file = open(path, "a")
+            if fcntl is not None:
+                fcntl.flock(held.file.fileno(), fcntl.LOCK_EX)
+        held.depth += 1
+        try:
+            yield
+        finally:
+            held.depth -= 1
+            if held.depth == 0:
+                # closing the file releases the flock
+                held.file.close()
+                held.file = None
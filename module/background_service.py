@@ -0,0 +1,114 @@
+"""
+Module for running storage and pay calculation off the Tk main thread.
+Calls are executed one at a time on a worker thread, in the order they were submitted, and their results
+are handed back to the main thread through root.after so that callbacks can safely touch widgets.
+"""
+import queue
+import traceback
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+POLL_INTERVAL_MS = 20
+
+
+class BackgroundService:
+    """
+    Runs functions on a worker thread and delivers their results on the Tk main thread.
+
+    A read request has a key. Submitting a new request with the same key makes the previous one stale:
+    it is cancelled if it has not started yet, and its result is dropped otherwise. This way only the
+    latest request of e.g. a calendar month change updates the window.
+    A write request has no key (None): it always runs and its result is always delivered, so a quick second
+    add does not cancel the first one or drop its result.
+    """
+
+    def __init__(self, root: tk.Tk, on_busy_change: Callable[[bool], None] | None = None):
+        self._root = root
+        self._on_busy_change = on_busy_change
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="baito-service")
+        self._results: queue.Queue = queue.Queue()
+        self._latest: dict[str, Future] = {}
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, key: str | None, function: Callable[..., Any], *args,
+               on_done: Callable[[Any], None] | None = None,
+               on_error: Callable[[BaseException], None] | None = None) -> None:
+        """
+        Run function(*args) on the worker thread.
+
+        Args:
+            key (str | None): identifies the kind of read request. A newer request with the same key makes this one
+                stale. None for a write, which is never cancelled and always delivered.
+            function (Callable[..., Any]): function to run on the worker thread. Must not touch widgets.
+            on_done (Callable[[Any], None] | None, optional): called on the main thread with the return value.
+                Defaults to None.
+            on_error (Callable[[BaseException], None] | None, optional): called on the main thread with the
+                raised exception. The traceback is printed if None. Defaults to None.
+        """
+        pending = self._pending + 1
+        previous = self._latest.get(key) if key is not None else None
+        if previous is not None and previous.cancel():
+            pending -= 1
+
+        future = self._executor.submit(function, *args)
+        if key is not None:
+            self._latest[key] = future
+        future.add_done_callback(lambda done: self._results.put((key, done, on_done, on_error)))
+        self._set_pending(pending)
+        if not self._polling:
+            self._polling = True
+            self._root.after(POLL_INTERVAL_MS, self._deliver_results)
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting requests and cancel the ones that have not started yet.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _set_pending(self, pending: int) -> None:
+        was_busy = self._pending > 0
+        self._pending = pending
+        if self._on_busy_change is not None and was_busy != (pending > 0):
+            self._on_busy_change(pending > 0)
+
+    def _deliver_results(self) -> None:
+        # results are only polled while requests are pending, so an idle window does no work
+        try:
+            while True:
+                try:
+                    key, future, on_done, on_error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if future.cancelled():
+                    continue
+                self._set_pending(self._pending - 1)
+                if key is not None:
+                    if self._latest.get(key) is not future:
+                        continue
+                    del self._latest[key]
+                self._run_callback(future, on_done, on_error)
+        finally:
+            # rescheduled even if something above raised, so that later results are still delivered
+            if self._pending > 0:
+                self._root.after(POLL_INTERVAL_MS, self._deliver_results)
+            else:
+                self._polling = False
+
+    @staticmethod
+    def _run_callback(future: Future, on_done: Callable[[Any], None] | None,
+                      on_error: Callable[[BaseException], None] | None) -> None:
+        # a failing callback (e.g. a TclError after its widget was destroyed) is printed and does not stop
+        # the delivery of the other results
+        exception = future.exception()
+        try:
+            if exception is None:
+                if on_done is not None:
+                    on_done(future.result())
+            elif on_error is not None:
+                on_error(exception)
+            else:
+                traceback.print_exception(type(exception), exception, exception.__traceback__)
+        except Exception as callback_error:
+            traceback.print_exception(type(callback_error), callback_error, callback_error.__traceback__)
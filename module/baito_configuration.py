@@ -1,46 +1,272 @@
 """
 Module for reading the configuration file and returning the values of the configuration.
+The file is parsed and validated once into a frozen BaitoConfiguration shared by the whole process (see get_config),
+so reading a value is a plain attribute lookup. Environment variables take precedence over the file.
+
+reload_config parses the file again if it was changed since it was read. Modules copy the values they need into
+constants when they are imported and keep them; only values looked up through get_config at each use (e.g. the
+wages, see pay_calculation.get_wage_profile) follow a reload.
 """
-from dotenv import load_dotenv
+from __future__ import annotations
 import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time
+from types import MappingProxyType
+from typing import Mapping
+from dotenv import dotenv_values
+
+CONFIG_PATH = "baito_config.env"
+
+# keys that can be set per worker by appending the name of the worker, e.g. WEEKDAY_WAGE_TANAKA
+WORKER_KEYS = ("WEEKDAY_WAGE", "WEEKEND_WAGE", "TRANSIT_FEE")
+
+
+def get_worker_key(worker: str) -> str:
+    """
+    Get the suffix of the per-worker keys of a worker, e.g. "TANAKA" for WEEKDAY_WAGE_TANAKA.
 
+    Args:
+        worker (str): name of the worker.
+
+    Returns:
+        str: name of the worker in upper case with "-" replaced by "_".
+    """
+    return worker.upper().replace("-", "_")
+
+
+@dataclass(frozen=True, slots=True)
 class BaitoConfiguration:
-    def __init__(self):
-        config_path = "baito_config.env"
-        load_dotenv(config_path)
-    
-    def get_weekday_wage(self) -> int:
-        return int(os.getenv("WEEKDAY_WAGE"))
-    
-    def get_weekend_wage(self) -> int:
-        return int(os.getenv("WEEKEND_WAGE"))
-    
-    def get_transit_fee(self) -> int:
-        return int(os.getenv("TRANSIT_FEE"))
-    
-    def get_pay_interval_minutes(self) -> int:
-        return int(os.getenv("PAY_INTERVAL_MINUTES"))
-    
-    def get_default_start_time(self) -> str:
-        return os.getenv("DEFAULT_START_TIME")
-    
-    def get_default_end_time(self) -> str:
-        return os.getenv("DEFAULT_END_TIME")
-    
-    def get_time_barrier(self) -> str:
-        return os.getenv("TIME_BARRIER")
-    
-    def get_file_format(self) -> str:
-        return os.getenv("FILE_FORMAT")
-    
-    def get_columns(self) -> list:
-        return str(os.getenv("COLUMNS")).split(",")
-    
-    def get_file_date_format(self) -> str:
-        return os.getenv("FILE_DATE_FORMAT")
-    
-    def get_date_format(self) -> str:
-        return os.getenv("DATE_FORMAT")
-    
-    def get_time_format(self) -> str:
-        return os.getenv("TIME_FORMAT")
\ No newline at end of file
+    """
+    Parsed values of the configuration file (see baito_config.env for their meaning).
+    path, mtime_ns: file the values were read from and its modification time, None if there was no file.
+    worker_wages: (weekday wage, weekend wage, transit fee) of every worker with a value of their own, by
+        get_worker_key. Values that are not set for the worker are the common ones.
+    """
+    path: str
+    mtime_ns: int | None
+    weekday_wage: int
+    weekend_wage: int
+    transit_fee: int
+    worker_wages: Mapping[str, tuple[int, int, int]]
+    pay_interval_minutes: int
+    default_start_time: time
+    default_end_time: time
+    file_format: str
+    columns: tuple[str, ...]
+    file_date_format: str
+    date_format: str
+    time_format: str
+    time_barrier: time
+    night_end: str
+    night_premium: float
+    weekend_days: tuple[int, ...]
+    pay_bands: str
+    holidays: str
+    overtime_after: str
+    overtime_premium: float
+    csv_write_mode: str
+    fsync_writes: bool
+    gui_debug: bool
+    storage_backend: str
+    sqlite_path: str
+    metrics_log: str
+    profile: str
+
+    def get_wages(self, worker: str | None = None) -> tuple[int, int, int]:
+        """
+        Get the wages of a worker, falling back to the common ones.
+
+        Args:
+            worker (str | None, optional): name of the worker. The common wages if None. Defaults to None.
+
+        Returns:
+            tuple[int, int, int]: weekday wage, weekend wage and transit fee.
+        """
+        if worker:
+            wages = self.worker_wages.get(get_worker_key(worker))
+            if wages is not None:
+                return wages
+        return self.weekday_wage, self.weekend_wage, self.transit_fee
+
+
+class _Values:
+    """
+    Raw values of the configuration file and the environment, converted with the key in every error message.
+    """
+
+    def __init__(self, path: str, values: dict[str, str]):
+        self.path = path
+        self.values = values
+
+    def get(self, key: str, default: str | None = None) -> str:
+        value = self.values.get(key)
+        if value is None:
+            if default is None:
+                raise ValueError(f"{key} is not set in {self.path}")
+            return default
+        return value.strip()
+
+    def invalid(self, key: str) -> ValueError:
+        return ValueError(f"Invalid {key} in {self.path}: {self.values.get(key)!r}")
+
+    def get_int(self, key: str, default: str | None = None, minimum: int = 0) -> int:
+        try:
+            value = int(self.get(key, default))
+        except ValueError:
+            raise self.invalid(key) from None
+        if value < minimum:
+            raise self.invalid(key)
+        return value
+
+    def get_float(self, key: str, default: str | None = None) -> float:
+        try:
+            value = float(self.get(key, default))
+        except ValueError:
+            raise self.invalid(key) from None
+        if value <= 0:
+            raise self.invalid(key)
+        return value
+
+    def get_bool(self, key: str, default: str) -> bool:
+        value = self.get(key, default).lower()
+        if value not in ("true", "false"):
+            raise self.invalid(key)
+        return value == "true"
+
+    def get_choice(self, key: str, default: str, choices: tuple[str, ...]) -> str:
+        value = self.get(key, default).lower()
+        if value not in choices:
+            raise self.invalid(key)
+        return value
+
+    def get_time(self, key: str, time_format: str, default: str | None = None) -> time:
+        try:
+            return datetime.strptime(self.get(key, default), time_format).time()
+        except ValueError:
+            raise self.invalid(key) from None
+
+
+def load_config(path: str = CONFIG_PATH) -> BaitoConfiguration:
+    """
+    Parse and validate a configuration file. A missing file is the same as an empty one.
+
+    Args:
+        path (str, optional): path of the configuration file. Defaults to CONFIG_PATH.
+
+    Raises:
+        ValueError: if a required value is missing or a value is invalid.
+
+    Returns:
+        BaitoConfiguration: values of the configuration.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        file_values = dotenv_values(path)
+    except FileNotFoundError:
+        mtime_ns, file_values = None, {}
+    raw = {key: value for key, value in file_values.items() if value is not None}
+    raw.update(os.environ)
+    values = _Values(path, raw)
+
+    weekday_wage = values.get_int("WEEKDAY_WAGE")
+    weekend_wage = values.get_int("WEEKEND_WAGE")
+    transit_fee = values.get_int("TRANSIT_FEE")
+    common_wages = (weekday_wage, weekend_wage, transit_fee)
+    worker_wages = {}
+    for key in raw:
+        for index, worker_key in enumerate(WORKER_KEYS):
+            if key.startswith(f"{worker_key}_"):
+                worker = key[len(worker_key) + 1:]
+                wages = list(worker_wages.get(worker, common_wages))
+                wages[index] = values.get_int(key)
+                worker_wages[worker] = tuple(wages)
+
+    time_format = values.get("TIME_FORMAT")
+    pay_interval_minutes = values.get_int("PAY_INTERVAL_MINUTES", minimum=1)
+    if pay_interval_minutes > 60:
+        raise values.invalid("PAY_INTERVAL_MINUTES")
+    weekend_days = []
+    for day in values.get("WEEKEND_DAYS", "5").split(","):
+        if not day.strip():
+            continue
+        if not day.strip().isdigit() or int(day) > 6:
+            raise values.invalid("WEEKEND_DAYS")
+        weekend_days.append(int(day))
+
+    return BaitoConfiguration(
+        path=path,
+        mtime_ns=mtime_ns,
+        weekday_wage=weekday_wage,
+        weekend_wage=weekend_wage,
+        transit_fee=transit_fee,
+        worker_wages=MappingProxyType(worker_wages),
+        pay_interval_minutes=pay_interval_minutes,
+        default_start_time=values.get_time("DEFAULT_START_TIME", time_format),
+        default_end_time=values.get_time("DEFAULT_END_TIME", time_format),
+        file_format=values.get("FILE_FORMAT"),
+        columns=tuple(column.strip() for column in values.get("COLUMNS").split(",")),
+        file_date_format=values.get("FILE_DATE_FORMAT"),
+        date_format=values.get("DATE_FORMAT"),
+        time_format=time_format,
+        time_barrier=values.get_time("TIME_BARRIER", time_format),
+        night_end=values.get("NIGHT_END", "05:00"),
+        night_premium=values.get_float("NIGHT_PREMIUM", "1.25"),
+        weekend_days=tuple(weekend_days),
+        pay_bands=values.get("PAY_BANDS", ""),
+        holidays=values.get_choice("HOLIDAYS", "", ("", "jp")),
+        overtime_after=values.get("OVERTIME_AFTER", ""),
+        overtime_premium=values.get_float("OVERTIME_PREMIUM", "1.25"),
+        csv_write_mode=values.get_choice("CSV_WRITE_MODE", "rewrite", ("rewrite", "log")),
+        fsync_writes=values.get_bool("FSYNC_WRITES", "true"),
+        gui_debug=values.get_bool("GUI_DEBUG", "false"),
+        storage_backend=values.get_choice("STORAGE_BACKEND", "csv", ("csv", "sqlite")),
+        sqlite_path=values.get("SQLITE_PATH", "worktime_info/worktime.sqlite3"),
+        metrics_log=values.get("METRICS_LOG", ""),
+        profile=values.get_choice("PROFILE", "", ("", "cprofile", "tracemalloc")),
+    )
+
+
+_config: BaitoConfiguration | None = None
+_config_lock = threading.Lock()
+
+
+def get_config() -> BaitoConfiguration:
+    """
+    Get the configuration of this process, reading the configuration file on first use.
+
+    Returns:
+        BaitoConfiguration: values of the configuration.
+    """
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = load_config()
+            config = _config
+    return config
+
+
+def reload_config() -> bool:
+    """
+    Read the configuration file again if its modification time changed since it was read.
+    The configuration is kept as it was if the changed file is invalid.
+
+    Raises:
+        ValueError: if the changed file is invalid.
+
+    Returns:
+        bool: True if the configuration was read again.
+    """
+    global _config
+    config = get_config()
+    try:
+        mtime_ns = os.stat(config.path).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+    if mtime_ns == config.mtime_ns:
+        return False
+    with _config_lock:
+        _config = load_config(config.path)
+    return True
@@ -1,20 +1,113 @@
 """
 Module for getting user input for the data entry process.
-Mainly used for the command line interface.
+Mainly used for the command line interface. The get_* functions ask again until the input is valid; the
+parse_* functions check values given in other ways, e.g. as command line arguments.
 """
+from __future__ import annotations
 from datetime import datetime
-from module.baito_configuration import BaitoConfiguration
+from typing import Callable
+from module.baito_configuration import get_config
 
 
-config = BaitoConfiguration()
+config = get_config()
 
 csv_file = None
-FILE_FORMAT = config.get_file_format()
-COLUMNS = config.get_columns()
-FILE_DATE_FORMAT = config.get_file_date_format()
-DATE_FORMAT = config.get_date_format()
-TIME_FORMAT = config.get_time_format()
-TIME_BARRIER = config.get_time_barrier()
+FILE_FORMAT = config.file_format
+COLUMNS = config.columns
+FILE_DATE_FORMAT = config.file_date_format
+DATE_FORMAT = config.date_format
+TIME_FORMAT = config.time_format
+TIME_BARRIER = config.time_barrier
+DEFAULT_START_TIME = config.default_start_time.strftime(TIME_FORMAT)
+
+
+def parse_year_month(text: str) -> str:
+    """
+    Check a year and month.
+
+    Args:
+        text (str): year and month in "yyyy-mm" format (the month may have a single digit).
+
+    Raises:
+        ValueError: if text is not a valid year and month.
+
+    Returns:
+        str: The year and month in "yyyy-mm" format.
+    """
+    return datetime.strptime(text, "%Y-%m").strftime("%Y-%m")
+
+
+def parse_day(text: str) -> str:
+    """
+    Check a day of the month.
+
+    Args:
+        text (str): day in "dd" format (may have a single digit).
+
+    Raises:
+        ValueError: if text is not a valid day.
+
+    Returns:
+        str: The day in "dd" format.
+    """
+    return datetime.strptime(text, "%d").strftime("%d")
+
+
+def parse_date(text: str) -> tuple[str, str]:
+    """
+    Check a date and split it into the year and month and the day.
+
+    Args:
+        text (str): date in "yyyy-mm-dd" format.
+
+    Raises:
+        ValueError: if text is not a valid date.
+
+    Returns:
+        tuple[str, str]: The year and month in "yyyy-mm" format and the day in "dd" format.
+    """
+    valid_date = datetime.strptime(text, "%Y-%m-%d")
+    return valid_date.strftime("%Y-%m"), valid_date.strftime("%d")
+
+
+def parse_time(text: str) -> str:
+    """
+    Check a time of the day.
+
+    Args:
+        text (str): time in "HH:MM" format.
+
+    Raises:
+        ValueError: if text is not a valid time.
+
+    Returns:
+        str: The time as it was given.
+    """
+    datetime.strptime(text, TIME_FORMAT)
+    return text
+
+
+def prompt_value(prompt: str, parse: Callable[[str], str], error_message: str, default: str | None = None) -> str:
+    """
+    Ask the user for a value until a valid one is entered.
+
+    Args:
+        prompt (str): The prompt to show the user.
+        parse (Callable[[str], str]): checks the input and returns the value, raising ValueError if it is invalid.
+        error_message (str): message shown after an invalid input.
+        default (str | None, optional): value of a blank input. Blank inputs are invalid if None. Defaults to None.
+
+    Returns:
+        str: The value returned by parse, or default.
+    """
+    while True:
+        text = input(prompt)
+        if default is not None and not text:
+            return default
+        try:
+            return parse(text)
+        except ValueError:
+            print(error_message)
 
 
 def get_year_month(prompt: str, allow_default: bool = False) -> str:
@@ -28,16 +121,9 @@ def get_year_month(prompt: str, allow_default: bool = False) -> str:
     Returns:
         str: The year and month in "yyyy-mm" format.
     """
-    date_str = input(prompt)
-    if allow_default and not date_str:
-        return datetime.today().strftime("%Y-%m")
-
-    try:
-        valid_date = datetime.strptime(date_str, "%Y-%m")
-        return valid_date.strftime("%Y-%m")
-    except ValueError:
-        print("Invalid date format. Please enter the date in yyyy-mm-dd format.")
-        return get_year_month(prompt, allow_default)
+    default = datetime.today().strftime("%Y-%m") if allow_default else None
+    return prompt_value(prompt, parse_year_month, "Invalid date format. Please enter the date in yyyy-mm format.",
+                        default)
 
 
 def get_day(prompt: str, allow_default: bool = False) -> str:
@@ -51,16 +137,8 @@ def get_day(prompt: str, allow_default: bool = False) -> str:
     Returns:
         str: The day in "dd" format.
     """
-    day_str = input(prompt)
-    if allow_default and not day_str:
-        return datetime.today().strftime("%d")
-
-    try:
-        valid_date = datetime.strptime(day_str, "%d")
-        return valid_date.strftime("%d")
-    except ValueError:
-        print("Invalid date format. Please enter the date in yyyy-mm-dd format.")
-        return get_day(prompt, allow_default)
+    default = datetime.today().strftime("%d") if allow_default else None
+    return prompt_value(prompt, parse_day, "Invalid date format. Please enter the day in dd format.", default)
 
 
 def get_start_time(prompt: str, allow_default: bool = False) -> str:
@@ -74,16 +152,8 @@ def get_start_time(prompt: str, allow_default: bool = False) -> str:
     Returns:
         str: The start time in "HH:MM" format.
     """
-    start_time = input(prompt)
-    if allow_default and not start_time:
-        return "17:00"
-
-    try:
-        valid_date = datetime.strptime(start_time, TIME_FORMAT)
-        return start_time
-    except ValueError:
-        print("Invalid time format. Please enter the date in HH:MM format.")
-        return get_start_time(prompt, allow_default)
+    default = DEFAULT_START_TIME if allow_default else None
+    return prompt_value(prompt, parse_time, "Invalid time format. Please enter the time in HH:MM format.", default)
 
 
 def get_end_time(prompt: str) -> str:
@@ -96,10 +166,4 @@ def get_end_time(prompt: str) -> str:
     Returns:
         str: The end time in "HH:MM" format.
     """
-    end_time = input(prompt)
-    try:
-        valid_date = datetime.strptime(end_time, TIME_FORMAT)
-        return end_time
-    except ValueError:
-        print("Invalid time format. Please enter the date in HH:MM format.")
-        return get_end_time(prompt)
\ No newline at end of file
+    return prompt_value(prompt, parse_time, "Invalid time format. Please enter the time in HH:MM format.")
@@ -0,0 +1,210 @@
+"""
+Module for measuring the program while it runs, e.g. to find out why a pay lookup is slow in production.
+Disabled unless METRICS_LOG or PROFILE is set in the configuration file or the environment
+(e.g. METRICS_LOG=- python Baito_cli.py pay --month 2024-07). While disabled, timed returns functions unchanged
+and count and log_event do nothing, so the instrumented code runs as fast as without them.
+
+METRICS_LOG: JSON Lines file ("-" for stderr) that receives
+    {"event": "timing", "name": ..., "ms": ...} for every call of a timed function or timer block,
+        with "error" set to the exception name if it raised,
+    the events of log_event,
+    {"event": "metrics", "counters": {...}, "timings": {name: {"calls", "total_ms", "max_ms"}}} at exit.
+PROFILE: "cprofile" profiles the main thread of the whole run, writes the stats to baito-<pid>.prof (for pstats
+    or snakeviz) and logs the functions with the most cumulative time. "tracemalloc" traces memory allocations
+    and logs the peak and the lines that allocated the most. Logged to stderr if METRICS_LOG is empty.
+Counters: reads and writes of the storage (csv.read, csv.write, csv.append, archive.read, archive.write,
+    sqlite.read, sqlite.write, sqlite.append), months served from memory or read again by the shift stores
+    (store.hit, store.miss) and shifts whose pay was not cached yet (pay_rules.miss).
+"""
+from __future__ import annotations
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import IO, Callable, TypeVar
+from module.baito_configuration import get_config
+
+config = get_config()
+
+METRICS_LOG = config.metrics_log
+PROFILE = config.profile
+ENABLED = bool(METRICS_LOG or PROFILE)
+
+# number of functions or lines logged by the profilers
+PROFILE_TOP = 20
+
+Function = TypeVar("Function", bound=Callable)
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {}
+# calls, total seconds and maximum seconds of each timed name
+_timings: dict[str, list] = {}
+_log_file: IO[str] | None = None
+_profiler = None
+
+
+def _write(record: dict) -> None:
+    record = {"time": round(time.time(), 6), "pid": os.getpid(), **record}
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        _log_file.write(line)
+        _log_file.flush()
+
+
+def _record(name: str, seconds: float, error: str | None) -> None:
+    with _lock:
+        timing = _timings.get(name)
+        if timing is None:
+            timing = _timings[name] = [0, 0.0, 0.0]
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+    record = {"event": "timing", "name": name, "ms": round(seconds * 1000, 3)}
+    if error is not None:
+        record["error"] = error
+    _write(record)
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def _log_event(event: str, **fields) -> None:
+    _write({"event": event, **fields})
+
+
+def _ignore(*args, **kwargs) -> None:
+    pass
+
+
+# count(name, amount=1): add to a counter. log_event(event, **fields): write an event to the log.
+count = _count if ENABLED else _ignore
+log_event = _log_event if ENABLED else _ignore
+
+
+def timed(name: str | None = None) -> Callable[[Function], Function]:
+    """
+    Decorator that logs the duration of every call of a function.
+    Put it below @classmethod or @staticmethod.
+
+    Args:
+        name (str | None, optional): name in the log. The qualified name of the function if None. Defaults to None.
+
+    Returns:
+        Callable[[Function], Function]: decorator. Returns the function unchanged while instrumentation is disabled.
+    """
+    def decorate(function: Function) -> Function:
+        if not ENABLED:
+            return function
+        label = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = None
+            try:
+                return function(*args, **kwargs)
+            except BaseException as exception:
+                error = type(exception).__name__
+                raise
+            finally:
+                _record(label, time.perf_counter() - start, error)
+        return wrapper
+    return decorate
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _record(self.name, time.perf_counter() - self.start, exc_type.__name__ if exc_type else None)
+        return False
+
+
+_NULL_TIMER = nullcontext()
+
+
+def timer(name: str):
+    """
+    Context manager that logs the duration of a block, like timed does for a function.
+
+    Args:
+        name (str): name in the log.
+
+    Returns:
+        context manager: a shared no-op context manager while instrumentation is disabled.
+    """
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+
+def get_metrics() -> dict:
+    """
+    Get the counters and timings collected so far.
+
+    Returns:
+        dict: {"counters": {name: int}, "timings": {name: {"calls": int, "total_ms": float, "max_ms": float}}}
+    """
+    with _lock:
+        return {"counters": dict(sorted(_counters.items())),
+                "timings": {name: {"calls": calls, "total_ms": round(total * 1000, 3), "max_ms": round(maximum * 1000, 3)}
+                            for name, (calls, total, maximum) in sorted(_timings.items())}}
+
+
+def _log_cprofile() -> None:
+    import pstats
+    _profiler.disable()
+    path = f"baito-{os.getpid()}.prof"
+    _profiler.dump_stats(path)
+    rows = sorted(pstats.Stats(_profiler).stats.items(), key=lambda item: item[1][3], reverse=True)
+    top = [{"function": f"{file}:{line}({function})", "calls": calls, "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3)}
+           for (file, line, function), (_, calls, own, cumulative, _) in rows[:PROFILE_TOP]]
+    _log_event("cprofile", path=path, top=top)
+
+
+def _log_tracemalloc() -> None:
+    import tracemalloc
+    _, peak = tracemalloc.get_traced_memory()
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    tracemalloc.stop()
+    top = [{"line": str(statistic.traceback), "kib": round(statistic.size / 1024, 1), "count": statistic.count}
+           for statistic in statistics[:PROFILE_TOP]]
+    _log_event("tracemalloc", peak_kib=round(peak / 1024, 1), top=top)
+
+
+def _finish() -> None:
+    if PROFILE == "cprofile":
+        _log_cprofile()
+    elif PROFILE == "tracemalloc":
+        _log_tracemalloc()
+    _log_event("metrics", **get_metrics())
+    if _log_file is not sys.stderr:
+        _log_file.close()
+
+
+if ENABLED:
+    if METRICS_LOG and METRICS_LOG != "-":
+        _log_file = open(METRICS_LOG, "a", encoding="utf-8")
+    else:
+        _log_file = sys.stderr
+    if PROFILE == "cprofile":
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    elif PROFILE == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+    atexit.register(_finish)
+    _log_event("start", argv=sys.argv, profile=PROFILE)
@@ -0,0 +1,61 @@
+"""
+Module for the national holidays of Japan, bundled as a table so that no network access or extra package is needed.
+The table covers HOLIDAY_YEARS and includes substitute holidays (振替休日), citizens' holidays (国民の休日)
+and the one-off changes of 2019 (enthronement) and 2020-2021 (Olympics). Years outside the table have no holidays.
+"""
+from __future__ import annotations
+
+HOLIDAY_YEARS = range(2016, 2031)
+
+# "mmdd" of every holiday of each year
+_HOLIDAYS = {
+    2016: "0101 0111 0211 0320 0321 0429 0503 0504 0505 0718 0811 0919 0922 1010 1103 1123 1223",
+    2017: "0101 0102 0109 0211 0320 0429 0503 0504 0505 0717 0811 0918 0923 1009 1103 1123 1223",
+    2018: "0101 0108 0211 0212 0321 0429 0430 0503 0504 0505 0716 0811 0917 0923 0924 1008 1103 1123 1223 1224",
+    2019: "0101 0114 0211 0321 0429 0430 0501 0502 0503 0504 0505 0506 0715 0811 0812 0916 0923 1014 1022 1103 1104 1123",
+    2020: "0101 0113 0211 0223 0224 0320 0429 0503 0504 0505 0506 0723 0724 0810 0921 0922 1103 1123",
+    2021: "0101 0111 0211 0223 0320 0429 0503 0504 0505 0722 0723 0808 0809 0920 0923 1103 1123",
+    2022: "0101 0110 0211 0223 0321 0429 0503 0504 0505 0718 0811 0919 0923 1010 1103 1123",
+    2023: "0101 0102 0109 0211 0223 0321 0429 0503 0504 0505 0717 0811 0918 0923 1009 1103 1123",
+    2024: "0101 0108 0211 0212 0223 0320 0429 0503 0504 0505 0506 0715 0811 0812 0916 0922 0923 1014 1103 1104 1123",
+    2025: "0101 0113 0211 0223 0224 0320 0429 0503 0504 0505 0506 0721 0811 0915 0923 1013 1103 1123 1124",
+    2026: "0101 0112 0211 0223 0320 0429 0503 0504 0505 0506 0720 0811 0921 0922 0923 1012 1103 1123",
+    2027: "0101 0111 0211 0223 0321 0322 0429 0503 0504 0505 0719 0811 0920 0923 1011 1103 1123",
+    2028: "0101 0110 0211 0223 0320 0429 0503 0504 0505 0717 0811 0918 0922 1009 1103 1123",
+    2029: "0101 0108 0211 0212 0223 0320 0429 0430 0503 0504 0505 0716 0811 0917 0923 0924 1008 1103 1123",
+    2030: "0101 0114 0211 0223 0320 0429 0503 0504 0505 0506 0715 0811 0812 0916 0923 1014 1103 1104 1123",
+}
+
+_month_holidays: dict[str, frozenset[int]] = {}
+
+
+def get_month_holidays(year_month: str) -> frozenset[int]:
+    """
+    Get the holidays of a month.
+
+    Args:
+        year_month (str): year and month in "yyyy-mm" format.
+
+    Returns:
+        frozenset[int]: days of the month that are holidays. Empty for years outside HOLIDAY_YEARS.
+    """
+    holidays = _month_holidays.get(year_month)
+    if holidays is None:
+        year, month = year_month.split("-")
+        holidays = frozenset(int(month_day[2:]) for month_day in _HOLIDAYS.get(int(year), "").split()
+                             if month_day[:2] == month)
+        _month_holidays[year_month] = holidays
+    return holidays
+
+
+def get_holiday_dates(year: int) -> list[str]:
+    """
+    Get the holidays of a year as dates.
+
+    Args:
+        year (int): year.
+
+    Returns:
+        list[str]: dates in "yyyy-mm-dd" format, in ascending order. Empty for years outside HOLIDAY_YEARS.
+    """
+    return [f"{year}-{month_day[:2]}-{month_day[2:]}" for month_day in _HOLIDAYS.get(year, "").split()]
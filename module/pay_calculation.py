@@ -0,0 +1,253 @@
+"""
+Module for calculating paying from worktime data.
+The core calculations work on the shifts of a month (MonthShifts) with plain Python arithmetic.
+calculate_frame_details does the same on whole columns of a worktime dataframe at once; it needs pandas and
+numpy and is meant for bulk analytics (see BaitoManage.get_workday_frame).
+"""
+from __future__ import annotations
+from module.baito_configuration import get_config
+from module.pay_rules import (PayRules, WEEKDAY, HOLIDAY, WEEKDAY_TYPES, MINUTES_PER_DAY, get_day_types,
+                              list_holiday_dates)
+from module.shift_records import MonthShifts
+from module.utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+config = get_config()
+
+DATE_FORMAT = config.date_format
+TIME_FORMAT = config.time_format
+
+
+class WageProfile:
+    """
+    Wages and transit fee of a worker.
+    """
+    __slots__ = ("weekday_wage", "weekend_wage", "transit_fee")
+
+    def __init__(self, weekday_wage: int, weekend_wage: int, transit_fee: int):
+        self.weekday_wage = weekday_wage
+        self.weekend_wage = weekend_wage
+        self.transit_fee = transit_fee
+
+
+def get_wage_profile(worker: str | None = None) -> WageProfile:
+    """
+    Get the wage profile of a worker from the configuration file.
+    Values that are not set for the worker (e.g. WEEKDAY_WAGE_TANAKA) fall back to the common ones.
+
+    Args:
+        worker (str | None, optional): name of the worker. The common profile if None. Defaults to None.
+
+    Returns:
+        WageProfile: wage profile of the worker.
+    """
+    # read at each call, so that wages follow reload_config
+    return WageProfile(*get_config().get_wages(worker))
+
+
+DEFAULT_WAGE_PROFILE = get_wage_profile()
+
+_pay_rules: dict[tuple[int, int], PayRules] = {}
+
+
+def get_pay_rules(profile: WageProfile = DEFAULT_WAGE_PROFILE) -> PayRules:
+    """
+    Get the compiled pay rules of a wage profile, compiling them on first use.
+
+    Args:
+        profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+
+    Returns:
+        PayRules: pay rules shared by every profile with the same wages.
+    """
+    key = (profile.weekday_wage, profile.weekend_wage)
+    rules = _pay_rules.get(key)
+    if rules is None:
+        rules = _pay_rules.setdefault(key, PayRules(*key))
+    return rules
+
+
+class MonthTotals:
+    """
+    Aggregated worktime and paying of a month.
+    Kept up to date incrementally by adding or subtracting the totals of single entries.
+    """
+    __slots__ = ("pay", "days", "minutes", "weekday_minutes", "weekend_minutes", "night_minutes")
+
+    def __init__(self, pay: float = 0, days: int = 0, minutes: int = 0,
+                 weekday_minutes: int = 0, weekend_minutes: int = 0, night_minutes: int = 0):
+        self.pay = pay
+        self.days = days
+        self.minutes = minutes
+        self.weekday_minutes = weekday_minutes
+        self.weekend_minutes = weekend_minutes
+        self.night_minutes = night_minutes
+
+    def add(self, other: "MonthTotals", sign: int = 1) -> None:
+        """
+        Add the totals of other to this object.
+
+        Args:
+            other (MonthTotals): totals to add.
+            sign (int, optional): 1 to add, -1 to subtract. Defaults to 1.
+        """
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + sign * getattr(other, name))
+
+    def is_close(self, other: "MonthTotals") -> bool:
+        """
+        Check if both totals are the same, allowing for rounding errors of the paying.
+
+        Args:
+            other (MonthTotals): totals to compare with.
+
+        Returns:
+            bool: True if the totals are the same.
+        """
+        return (abs(self.pay - other.pay) < 1e-6
+                and all(getattr(self, name) == getattr(other, name) for name in self.__slots__[1:]))
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def calculate_shift_pay(weekday: int, start_minute: int, end_minute: int,
+                        profile: WageProfile = DEFAULT_WAGE_PROFILE, holiday: bool = False) -> float:
+    """
+    Calculate the paying of a single shift, excluding transit fee.
+    The premium portion of the pay bands and overtime is truncated per day.
+
+    Args:
+        weekday (int): weekday of the shift (0 = Monday).
+        start_minute (int): start time in minutes since midnight.
+        end_minute (int): end time in minutes since midnight, after 24:00 if the shift ends on the next day.
+        profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+        holiday (bool, optional): whether the shift is on a holiday. Defaults to False.
+
+    Returns:
+        float: paying of the shift.
+    """
+    day_type = HOLIDAY if holiday else WEEKDAY_TYPES[weekday]
+    return get_pay_rules(profile).calculate_shift_pay(day_type, start_minute, end_minute)
+
+
+def calculate_totals(shifts: MonthShifts, profile: WageProfile = DEFAULT_WAGE_PROFILE) -> MonthTotals:
+    """
+    Calculate the aggregated worktime and paying (including transit fee) of the shifts of a month.
+
+    Args:
+        shifts (MonthShifts): shifts of the month.
+        profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+
+    Returns:
+        MonthTotals: totals of every shift.
+    """
+    rules = get_pay_rules(profile)
+    day_types = get_day_types(shifts)
+    totals = MonthTotals(days=len(shifts))
+    for day, start_minute, end_minute in shifts:
+        day_type = day_types[day]
+        work_minutes = end_minute - start_minute
+        totals.pay += rules.calculate_shift_pay(day_type, start_minute, end_minute) + 2*profile.transit_fee
+        totals.minutes += work_minutes
+        # holidays count as weekend, as they are paid with the weekend wage
+        if day_type == WEEKDAY:
+            totals.weekday_minutes += work_minutes
+        else:
+            totals.weekend_minutes += work_minutes
+        totals.night_minutes += rules.split_minutes(start_minute, end_minute)[1]
+    return totals
+
+
+def calculate_daily_details(shifts: MonthShifts,
+                            profile: WageProfile = DEFAULT_WAGE_PROFILE) -> list[tuple[str, str, str, float, float]]:
+    """
+    Calculate the workhours and paying (including transit fee) of every shift of a month.
+    The paying of all shifts adds up to the paying of calculate_totals.
+
+    Args:
+        shifts (MonthShifts): shifts of the month.
+        profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+
+    Returns:
+        list[tuple[str, str, str, float, float]]: (date, start time, end time, hours, paying) of each shift,
+            in order of shifts.
+    """
+    rules = get_pay_rules(profile)
+    day_types = get_day_types(shifts)
+    details = []
+    for (day, start_minute, end_minute), (date, start_time, end_time) in zip(shifts, shifts.rows()):
+        paying = rules.calculate_shift_pay(day_types[day], start_minute, end_minute) + 2*profile.transit_fee
+        details.append((date, start_time, end_time, (end_minute - start_minute) / 60, paying))
+    return details
+
+
+def _to_minutes(times: pd.Series) -> np.ndarray:
+    """
+    Convert a column of "hh:mm" strings to minutes since midnight.
+
+    Args:
+        times (pd.Series): column of times in "hh:mm" format.
+
+    Returns:
+        np.ndarray: minutes since midnight for each row.
+    """
+    parsed = pd.to_datetime(times, format=TIME_FORMAT)
+    return (parsed.dt.hour * 60 + parsed.dt.minute).to_numpy(dtype=np.int64)
+
+
+def _parse_worktime(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse the date, start and end columns of a worktime dataframe once.
+
+    Args:
+        df (pd.DataFrame): worktime data with the configured COLUMNS.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: day type, start minute and end minute of each row.
+            The end minute is after 24:00 if the shift ends on the next day.
+    """
+    dates = pd.to_datetime(df["date"], format=DATE_FORMAT)
+    day_types = np.asarray(WEEKDAY_TYPES)[dates.dt.weekday.to_numpy()]
+    holiday_dates = list_holiday_dates(dates.dt.year.unique().tolist())
+    if holiday_dates:
+        day_types[dates.isin(pd.to_datetime(holiday_dates)).to_numpy()] = HOLIDAY
+    start_minutes, end_minutes = _to_minutes(df["start_time"]), _to_minutes(df["end_time"])
+    end_minutes = np.where(end_minutes <= start_minutes, end_minutes + MINUTES_PER_DAY, end_minutes)
+    return day_types, start_minutes, end_minutes
+
+
+def _calculate_daily_pay(day_types: np.ndarray, start_minutes: np.ndarray, end_minutes: np.ndarray,
+                         profile: WageProfile) -> np.ndarray:
+    # every distinct (day type, start, end) is calculated once by the pay rules
+    rules = get_pay_rules(profile)
+    base = 2*MINUTES_PER_DAY + 1
+    keys = (day_types * base + start_minutes) * base + end_minutes
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    paying = np.array([rules.calculate_shift_pay(key // base**2, key // base % base, key % base)
+                       for key in unique_keys.tolist()], dtype=float)
+    return paying[inverse.reshape(-1)]
+
+
+def calculate_frame_details(df: pd.DataFrame, profile: WageProfile = DEFAULT_WAGE_PROFILE) -> pd.DataFrame:
+    """
+    Add the workhours and paying (including transit fee) of every row to a worktime dataframe.
+
+    Args:
+        df (pd.DataFrame): worktime data with the configured COLUMNS.
+        profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+
+    Returns:
+        pd.DataFrame: copy of df with "hours" and "pay" columns.
+    """
+    df = df.copy()
+    if df.empty:
+        df["hours"] = pd.Series(dtype=float)
+        df["pay"] = pd.Series(dtype=float)
+        return df
+    day_types, start_minutes, end_minutes = _parse_worktime(df)
+    df["hours"] = (end_minutes - start_minutes) / 60
+    df["pay"] = _calculate_daily_pay(day_types, start_minutes, end_minutes, profile) + 2*profile.transit_fee
+    return df
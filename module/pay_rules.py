@@ -0,0 +1,285 @@
+"""
+Module for the pay rules, compiled once into lookup tables.
+The rules are read from the configuration file once:
+    WEEKEND_DAYS: weekdays paid with the weekend wage (0 = Monday, comma separated). Defaults to 5 (Saturday).
+    HOLIDAYS: "jp" to pay the national holidays of Japan (see jp_holidays) with the weekend wage. Disabled if empty.
+    PAY_BANDS: time-of-day bands with a multiplier of the wage, "hh:mm-hh:mm*multiplier" separated by commas,
+        e.g. "22:00-24:00*1.25,05:00-08:00*1.1". A band that ends before it starts runs into the next day: its
+        hours after midnight only apply to a shift that continues past midnight, not to a shift starting then.
+        Defaults to TIME_BARRIER-NIGHT_END*NIGHT_PREMIUM, i.e. the night premium until NIGHT_END of the next day,
+        so a shift from 02:00 to 04:00 is paid without it (as with the former TIME_BARRIER-24:00 band).
+    OVERTIME_AFTER: worktime of a day ("hh:mm") after which OVERTIME_PREMIUM applies. Disabled if empty.
+Premiums that overlap add up, e.g. a band of 1.25 during overtime of 1.25 pays 1.5 times the wage.
+A shift that crosses midnight (see shift_records) is paid with the wage of the day it starts on, and the bands
+that run into the next day as well as the bands of the next day apply after midnight.
+
+The bands are swept once into segments of the day with a constant multiplier, so a shift is split into rate
+segments by a binary search and a single walk over the segments it covers, however many bands there are.
+Shift patterns repeat a lot (e.g. 17:00-22:00 on weekdays), so the pay of every (day type, start, end) is
+calculated once and looked up afterwards.
+"""
+from __future__ import annotations
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Iterable
+from module.baito_configuration import get_config
+from module.instrumentation import count
+from module.jp_holidays import get_holiday_dates, get_month_holidays
+from module.shift_records import MINUTES_PER_DAY, MonthShifts, parse_minutes
+
+config = get_config()
+
+TIME_BARRIER = config.time_barrier
+
+BARRIER_MINUTES = TIME_BARRIER.hour * 60 + TIME_BARRIER.minute
+NIGHT_END = config.night_end
+NIGHT_PREMIUM = config.night_premium
+WEEKEND_DAYS = frozenset(config.weekend_days)
+PAY_BANDS = config.pay_bands or f"{TIME_BARRIER:%H:%M}-{NIGHT_END}*{NIGHT_PREMIUM}"
+HOLIDAYS = config.holidays
+OVERTIME_AFTER = config.overtime_after
+OVERTIME_PREMIUM = config.overtime_premium
+
+PAY_CACHE_SIZE = 4096
+
+# day types, i.e. the index of the wage in PayRules.base_wages
+WEEKDAY, WEEKEND, HOLIDAY = 0, 1, 2
+WEEKDAY_TYPES = tuple(WEEKEND if weekday in WEEKEND_DAYS else WEEKDAY for weekday in range(7))
+
+
+def parse_pay_bands(pay_bands: str) -> list[tuple[int, int, float]]:
+    """
+    Parse time-of-day bands in the PAY_BANDS format. A band that ends before it starts ends on the next day.
+
+    Args:
+        pay_bands (str): bands, e.g. "22:00-24:00*1.25,05:00-08:00*1.1".
+
+    Raises:
+        ValueError: if a band is malformed.
+
+    Returns:
+        list[tuple[int, int, float]]: start minute, end minute (after 24:00 if the band ends on the next day) and
+            multiplier of each band.
+    """
+    bands = []
+    for band in pay_bands.split(","):
+        if not band.strip():
+            continue
+        try:
+            times, multiplier = band.split("*")
+            start_time, end_time = times.split("-")
+            start_minute, end_minute = parse_minutes(start_time.strip()), parse_minutes(end_time.strip())
+            multiplier = float(multiplier)
+        except ValueError:
+            raise ValueError(f"Invalid pay band: {band.strip()}") from None
+        if not (0 <= start_minute <= MINUTES_PER_DAY and 0 <= end_minute <= MINUTES_PER_DAY) \
+                or start_minute == end_minute:
+            raise ValueError(f"Invalid pay band: {band.strip()}")
+        if end_minute < start_minute:
+            end_minute += MINUTES_PER_DAY
+        bands.append((start_minute, end_minute, multiplier))
+    return bands
+
+
+def combine_multipliers(multipliers: Iterable[float]) -> float:
+    """
+    Combine the multipliers that apply to the same minute by adding up their premiums.
+    A single multiplier is kept as it is, so that it is not changed by rounding.
+
+    Args:
+        multipliers (Iterable[float]): multipliers of the wage.
+
+    Returns:
+        float: combined multiplier, 1.0 if there is none.
+    """
+    premiums = [multiplier for multiplier in multipliers if multiplier != 1]
+    if len(premiums) <= 1:
+        return premiums[0] if premiums else 1.0
+    return 1 + sum(multiplier - 1 for multiplier in premiums)
+
+
+def compile_segments(bands: list[tuple[int, int, float]],
+                     end: int = MINUTES_PER_DAY) -> tuple[list[int], list[float]]:
+    """
+    Sweep over the start and end of every band to split the time until end into segments with a constant multiplier.
+
+    Args:
+        bands (list[tuple[int, int, float]]): start minute, end minute and multiplier of each band.
+        end (int, optional): minute the last segment ends at. Defaults to MINUTES_PER_DAY.
+
+    Returns:
+        tuple[list[int], list[float]]: start minute of each segment followed by end, and the
+            multiplier of each segment. Neighbouring segments always have different multipliers.
+    """
+    changes: dict[int, list[tuple[bool, float]]] = {0: []}
+    for start_minute, end_minute, multiplier in bands:
+        changes.setdefault(start_minute, []).append((True, multiplier))
+        changes.setdefault(end_minute, []).append((False, multiplier))
+
+    points, multipliers = [], []
+    active: list[float] = []
+    for minute in sorted(changes):
+        if minute >= end:
+            break
+        for is_start, multiplier in changes[minute]:
+            if is_start:
+                active.append(multiplier)
+            else:
+                active.remove(multiplier)
+        multiplier = combine_multipliers(active)
+        if not multipliers or multipliers[-1] != multiplier:
+            points.append(minute)
+            multipliers.append(multiplier)
+    points.append(end)
+    return points, multipliers
+
+
+_day_types: dict[str, bytes] = {}
+
+
+def get_day_types(shifts: MonthShifts) -> bytes:
+    """
+    Get the day type (WEEKDAY, WEEKEND or HOLIDAY) of every day of the month of shifts.
+
+    Args:
+        shifts (MonthShifts): shifts of the month.
+
+    Returns:
+        bytes: day type of each day, indexed by the day of the month (index 0 is unused).
+    """
+    day_types = _day_types.get(shifts.year_month)
+    if day_types is None:
+        holidays = get_month_holidays(shifts.year_month) if HOLIDAYS == "jp" else frozenset()
+        day_types = bytes([WEEKDAY] + [HOLIDAY if day in holidays else WEEKDAY_TYPES[shifts.get_weekday(day)]
+                                       for day in range(1, shifts.days_in_month + 1)])
+        _day_types[shifts.year_month] = day_types
+    return day_types
+
+
+def list_holiday_dates(years: Iterable[int]) -> list[str]:
+    """
+    Get the holidays paid with the weekend wage in some years.
+
+    Args:
+        years (Iterable[int]): years.
+
+    Returns:
+        list[str]: dates in "yyyy-mm-dd" format. Empty if HOLIDAYS is disabled.
+    """
+    if HOLIDAYS != "jp":
+        return []
+    return [date for year in years for date in get_holiday_dates(year)]
+
+
+class PayRules:
+    """
+    Pay rules of one pair of wages as lookup tables:
+    base_wages: wage of each day type (WEEKDAY, WEEKEND, HOLIDAY). Holidays are paid with the weekend wage.
+    points, multipliers: segments with a constant multiplier (see compile_segments) of the day and the next day,
+        so that shifts crossing midnight are split in the same single walk.
+    band_minutes: number of minutes inside a band before each minute of the day and the next day (a prefix sum),
+        so the band minutes of any shift are a single subtraction.
+    overtime_after: worktime in minutes after which overtime_premium applies, or None.
+    rules_id: checksum of every rule except the wages, to tell if stored totals were calculated with the same rules.
+    """
+    __slots__ = ("base_wages", "points", "multipliers", "band_minutes", "overtime_after", "overtime_premium",
+                 "rules_id", "_cache")
+
+    def __init__(self, weekday_wage: int, weekend_wage: int, pay_bands: str = PAY_BANDS,
+                 overtime_after: str = OVERTIME_AFTER, overtime_premium: float = OVERTIME_PREMIUM):
+        self.base_wages = (weekday_wage, weekend_wage, weekend_wage)
+        # the bands of the day (some running into the next day) and the bands of the next day
+        bands = parse_pay_bands(pay_bands)
+        bands += [(start_minute + MINUTES_PER_DAY, min(end_minute + MINUTES_PER_DAY, 2*MINUTES_PER_DAY), multiplier)
+                  for start_minute, end_minute, multiplier in bands]
+        points, multipliers = compile_segments(bands, 2*MINUTES_PER_DAY)
+        self.points = points
+        self.multipliers = multipliers
+        self.band_minutes = array("H", [0])
+        for index, multiplier in enumerate(self.multipliers):
+            for _ in range(self.points[index], self.points[index + 1]):
+                self.band_minutes.append(self.band_minutes[-1] + (multiplier != 1))
+        self.overtime_after = parse_minutes(overtime_after) if overtime_after else None
+        self.overtime_premium = overtime_premium
+        rules = (points, multipliers, self.overtime_after, overtime_premium, sorted(WEEKEND_DAYS), HOLIDAYS)
+        self.rules_id = zlib.crc32(repr(rules).encode())
+        self._cache: dict[tuple[int, int, int], float] = {}
+
+    def split_minutes(self, start_minute: int, end_minute: int) -> tuple[int, int]:
+        """
+        Split a shift into minutes outside and inside the pay bands (e.g. the night minutes).
+
+        Args:
+            start_minute (int): start time in minutes since midnight.
+            end_minute (int): end time in minutes since midnight, after 24:00 if the shift ends on the next day.
+
+        Returns:
+            tuple[int, int]: minutes outside the bands and minutes inside the bands.
+        """
+        band_minutes = self.band_minutes[end_minute] - self.band_minutes[start_minute]
+        return end_minute - start_minute - band_minutes, band_minutes
+
+    def split_segments(self, start_minute: int, end_minute: int) -> list[tuple[int, float]]:
+        """
+        Split a shift into rate segments, including overtime.
+
+        Args:
+            start_minute (int): start time in minutes since midnight.
+            end_minute (int): end time in minutes since midnight, after 24:00 if the shift ends on the next day.
+
+        Returns:
+            list[tuple[int, float]]: minutes and multiplier of each segment, in order of time.
+        """
+        overtime_minute = end_minute
+        if self.overtime_after is not None:
+            overtime_minute = min(end_minute, start_minute + self.overtime_after)
+        segments = []
+        index = bisect_right(self.points, start_minute) - 1
+        minute = start_minute
+        while minute < end_minute:
+            segment_end = min(self.points[index + 1], end_minute)
+            multiplier = self.multipliers[index]
+            if minute < overtime_minute < segment_end:
+                segments.append((overtime_minute - minute, multiplier))
+                minute = overtime_minute
+            if minute >= overtime_minute:
+                multiplier = combine_multipliers((multiplier, self.overtime_premium))
+            segments.append((segment_end - minute, multiplier))
+            minute = segment_end
+            index += 1
+        return segments
+
+    def calculate_shift_pay(self, day_type: int, start_minute: int, end_minute: int) -> float:
+        """
+        Calculate the paying of a single shift, excluding transit fee.
+        The premium portion is truncated per day.
+
+        Args:
+            day_type (int): WEEKDAY, WEEKEND or HOLIDAY.
+            start_minute (int): start time in minutes since midnight.
+            end_minute (int): end time in minutes since midnight, after 24:00 if the shift ends on the next day.
+
+        Returns:
+            float: paying of the shift.
+        """
+        key = (day_type, start_minute, end_minute)
+        paying = self._cache.get(key)
+        if paying is None:
+            count("pay_rules.miss")
+            base_wage = self.base_wages[day_type]
+            premium_minutes: dict[float, int] = {}
+            for minutes, multiplier in self.split_segments(start_minute, end_minute):
+                if multiplier != 1:
+                    premium_minutes[multiplier] = premium_minutes.get(multiplier, 0) + minutes
+            regular_minutes = end_minute - start_minute - sum(premium_minutes.values())
+            if premium_minutes:
+                premium_paying = sum(minutes * 60 / (60**2) * base_wage * multiplier
+                                     for multiplier, minutes in premium_minutes.items())
+                paying = regular_minutes * 60 / (60**2) * base_wage + int(premium_paying)
+            else:
+                paying = regular_minutes * 60 * base_wage / (60**2)
+            if len(self._cache) >= PAY_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = paying
+        return paying
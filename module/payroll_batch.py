@@ -0,0 +1,115 @@
+"""
+Module for calculating payroll of many months and workers at once.
+Every month of every worker is an independent task, so the tasks are spread over a process pool and
+the results are merged into a single report.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from module.pay_calculation import get_wage_profile
+from module.storage import STORAGE_BACKEND, DATA_DIRECTORY, DEFAULT_WORKER, create_storage, list_workers
+
+REPORT_COLUMNS = ["directory", "worker", "year_month", "pay", "days", "hours",
+                  "weekday_minutes", "weekend_minutes", "night_minutes"]
+
+
+def _calculate_month(task: tuple[str, str, str, str]) -> dict:
+    """
+    Read a single month and calculate its totals. Runs in a worker process.
+
+    Args:
+        task (tuple[str, str, str, str]): backend, data directory, worker and month in "yyyy-mm" format.
+
+    Returns:
+        dict: one row of the report (see REPORT_COLUMNS).
+    """
+    backend, directory, worker, year_month = task
+    storage = create_storage(backend, worker, directory)
+    totals = storage.calculate_totals(year_month, storage.read(year_month), get_wage_profile(worker))
+    row = {"directory": directory, "worker": worker, "year_month": year_month}
+    row.update(totals.as_dict())
+    row["hours"] = totals.minutes / 60
+    del row["minutes"]
+    return row
+
+
+def run_payroll(start_year_month: str, end_year_month: str, workers: list[str] | None = None,
+                directories: list[str] | None = None, backend: str = STORAGE_BACKEND,
+                processes: int | None = None) -> list[dict]:
+    """
+    Calculate the totals of every existing month in the range for every worker, using a process pool.
+
+    Args:
+        start_year_month (str): first month in "yyyy-mm" format.
+        end_year_month (str): last month in "yyyy-mm" format.
+        workers (list[str] | None, optional): names of the workers. The default worker and every worker
+            with data if None. Defaults to None.
+        directories (list[str] | None, optional): data directories of the csv backend. Defaults to [DATA_DIRECTORY].
+        backend (str, optional): "csv" or "sqlite". Defaults to STORAGE_BACKEND.
+        processes (int | None, optional): number of worker processes. Number of CPUs if None. Defaults to None.
+
+    Returns:
+        list[dict]: one row per month and worker (see REPORT_COLUMNS), sorted by directory, worker and month.
+    """
+    if directories is None or backend != "csv":
+        directories = [DATA_DIRECTORY]
+
+    tasks = []
+    for directory in directories:
+        directory_workers = workers
+        if directory_workers is None:
+            directory_workers = [DEFAULT_WORKER] + list_workers(backend, directory)
+        for worker in directory_workers:
+            storage = create_storage(backend, worker, directory)
+            for year_month in storage.list_months(start_year_month, end_year_month):
+                tasks.append((backend, directory, worker, year_month))
+    if not tasks:
+        return []
+
+    processes = min(processes or os.cpu_count() or 1, len(tasks))
+    if processes == 1:
+        rows = list(map(_calculate_month, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            rows = list(executor.map(_calculate_month, tasks, chunksize=max(1, len(tasks) // (processes * 4))))
+    return sorted(rows, key=lambda row: (row["directory"], row["worker"], row["year_month"]))
+
+
+def summarize_payroll(rows: list[dict]) -> dict[tuple[str, str], dict]:
+    """
+    Merge the rows of a payroll report into the totals of each worker of each data directory.
+    Workers of the same name in different directories are kept apart, like the rows of the report.
+
+    Args:
+        rows (list[dict]): rows returned by run_payroll.
+
+    Returns:
+        dict[tuple[str, str], dict]: {"pay": float, "hours": float, "days": int} of each (directory, worker)
+            ("" for the default worker), in the order of the rows.
+    """
+    summary = {}
+    for row in rows:
+        totals = summary.setdefault((row["directory"], row["worker"]), {"pay": 0, "hours": 0, "days": 0})
+        for key in totals:
+            totals[key] += row[key]
+    return summary
+
+
+def write_report(rows: list[dict], path: str) -> None:
+    """
+    Write a payroll report as csv, or as JSON if path ends with ".json".
+
+    Args:
+        rows (list[dict]): rows returned by run_payroll.
+        path (str): path of the report file.
+    """
+    with open(path, "w", newline="") as report_file:
+        if path.endswith(".json"):
+            workers = [{"directory": directory, "worker": worker, **totals}
+                       for (directory, worker), totals in summarize_payroll(rows).items()]
+            json.dump({"months": rows, "workers": workers}, report_file, indent=2)
+        else:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
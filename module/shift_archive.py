@@ -0,0 +1,131 @@
+"""
+Module for the binary archive format of finished months.
+An archive file holds the same shifts as a month csv file, but as packed little-endian columns that are
+loaded with a single read and no text parsing, together with the totals of the month.
+
+Layout:
+    header: magic "BAIT", format version, shift count, the wages and pay rules (PayRules.rules_id) the totals
+        were calculated with and the totals. Version 1 archives have no rules_id. Totals of archives older than
+        version 3 are always recalculated, as they were written before shifts could cross midnight.
+    columns: day of the month (uint8 * count), start minute (uint16 * count), end minute (uint16 * count).
+        The end minute is after 24:00 (1440) if the shift ends on the next day.
+"""
+from __future__ import annotations
+import struct
+import sys
+from array import array
+from module.atomic_files import atomic_write
+from module.instrumentation import count
+from module.pay_calculation import MonthTotals, WageProfile, get_pay_rules
+from module.shift_records import MonthShifts, to_interval
+
+ARCHIVE_SUFFIX = ".bin"
+ARCHIVE_MAGIC = b"BAIT"
+ARCHIVE_VERSION = 3
+
+_PREFIX = struct.Struct("<4sB")
+# magic, version, count, weekday wage, weekend wage, transit fee, pay, minutes, weekday/weekend/night minutes
+_HEADER_V1 = struct.Struct("<4sBxHiiidIIII")
+# magic, version, count, rules_id, weekday wage, weekend wage, transit fee, pay, minutes, weekday/weekend/night minutes
+_HEADER = struct.Struct("<4sBxHIiiidIIII")
+
+
+class ArchiveHeader:
+    """
+    Totals stored in an archive file and the wages and pay rules they were calculated with.
+    """
+    __slots__ = ("wages", "rules_id", "totals")
+
+    def __init__(self, wages: tuple[int, int, int], rules_id: int | None, totals: MonthTotals):
+        self.wages = wages
+        self.rules_id = rules_id
+        self.totals = totals
+
+    def get_totals(self, profile: WageProfile) -> MonthTotals | None:
+        """
+        Get the stored totals if they were calculated with the same wages and pay rules.
+
+        Args:
+            profile (WageProfile): wages to pay.
+
+        Returns:
+            MonthTotals | None: copy of the stored totals, or None if the wages or pay rules differ.
+        """
+        if (self.wages != (profile.weekday_wage, profile.weekend_wage, profile.transit_fee)
+                or self.rules_id != get_pay_rules(profile).rules_id):
+            return None
+        return MonthTotals(**self.totals.as_dict())
+
+
+def _to_little_endian(column: array) -> array:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def write_archive(path: str, shifts: MonthShifts, totals: MonthTotals, profile: WageProfile) -> None:
+    """
+    Write the shifts of a month and their totals to an archive file.
+    The file is written under a temporary name and renamed, so readers never see a partial archive.
+
+    Args:
+        path (str): path of the archive file.
+        shifts (MonthShifts): shifts of the month.
+        totals (MonthTotals): totals of the shifts, calculated with profile.
+        profile (WageProfile): wages the totals were calculated with.
+    """
+    header = _HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(shifts), get_pay_rules(profile).rules_id,
+                          profile.weekday_wage, profile.weekend_wage, profile.transit_fee,
+                          totals.pay, totals.minutes, totals.weekday_minutes, totals.weekend_minutes,
+                          totals.night_minutes)
+    count("archive.write")
+    with atomic_write(path, "wb") as archive_file:
+        archive_file.write(header)
+        for column in (shifts.days, shifts.start_minutes, shifts.end_minutes):
+            _to_little_endian(column).tofile(archive_file)
+
+
+def read_archive(path: str, year_month: str) -> tuple[MonthShifts, ArchiveHeader]:
+    """
+    Read the shifts of a month and their stored totals from an archive file.
+
+    Args:
+        path (str): path of the archive file.
+        year_month (str): year and month in "yyyy-mm" format.
+
+    Raises:
+        ValueError: if the file is not an archive of a supported version.
+
+    Returns:
+        tuple[MonthShifts, ArchiveHeader]: shifts of the month and the stored totals.
+    """
+    count("archive.read")
+    with open(path, "rb") as archive_file:
+        data = archive_file.read()
+    magic, version = _PREFIX.unpack_from(data)
+    if magic != ARCHIVE_MAGIC or not 1 <= version <= ARCHIVE_VERSION:
+        raise ValueError(f"Not a worktime archive: {path}")
+    if version == 1:
+        (_, _, shift_count, weekday_wage, weekend_wage, transit_fee,
+         pay, minutes, weekday_minutes, weekend_minutes, night_minutes) = _HEADER_V1.unpack_from(data)
+        rules_id, header_size = None, _HEADER_V1.size
+    else:
+        (_, _, shift_count, rules_id, weekday_wage, weekend_wage, transit_fee,
+         pay, minutes, weekday_minutes, weekend_minutes, night_minutes) = _HEADER.unpack_from(data)
+        header_size = _HEADER.size
+
+    shifts = MonthShifts(year_month)
+    offset = header_size
+    for column, size in ((shifts.days, 1), (shifts.start_minutes, 2), (shifts.end_minutes, 2)):
+        column.frombytes(data[offset:offset + shift_count * size])
+        if sys.byteorder == "big":
+            column.byteswap()
+        offset += shift_count * size
+    if version < ARCHIVE_VERSION:
+        rules_id = None
+        # older versions kept the end time of shifts ending on the next day as it was written in the csv file
+        for index, (start_minute, end_minute) in enumerate(zip(shifts.start_minutes, shifts.end_minutes)):
+            shifts.end_minutes[index] = to_interval(start_minute, end_minute)[1]
+    totals = MonthTotals(pay, shift_count, minutes, weekday_minutes, weekend_minutes, night_minutes)
+    return shifts, ArchiveHeader((weekday_wage, weekend_wage, transit_fee), rules_id, totals)
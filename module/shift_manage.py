@@ -1,88 +1,103 @@
 """
-Module for managing worktime data by directly interacting with the csv files.
+Module for managing worktime data of one or more workers (served through the in-memory shift stores).
 It provides functions to add, remove, and calculate total paying for worktime entries.
 """
-from datetime import datetime
-import pandas as pd
-import csv
-from module.data_entry import get_year_month, get_day, get_start_time, get_end_time
-from module.baito_configuration import BaitoConfiguration
+import sys
+from typing import TYPE_CHECKING
+from module.baito_configuration import get_config
+from module.instrumentation import log_event, timed
 from module.utils import get_current_date, thousands_separators
+from module.pay_calculation import calculate_daily_details, calculate_frame_details
+from module.shift_records import format_minutes, is_year_month, parse_shift
+from module.shift_store import get_shift_store
+from module.shift_transfer import detect_format, export_shifts, import_shifts
+from module.storage import DEFAULT_WORKER, list_workers
 
-config = BaitoConfiguration()
+if TYPE_CHECKING:
+    import pandas as pd
+
+config = get_config()
 
 csv_file = None
-FILE_FORMAT = config.get_file_format()
-COLUMNS = config.get_columns()
-FILE_DATE_FORMAT = config.get_file_date_format()
-DATE_FORMAT = config.get_date_format()
-TIME_FORMAT = config.get_time_format()
-TIME_BARRIER = config.get_time_barrier()
+FILE_FORMAT = config.file_format
+COLUMNS = config.columns
+FILE_DATE_FORMAT = config.file_date_format
+DATE_FORMAT = config.date_format
+TIME_FORMAT = config.time_format
+TIME_BARRIER = config.time_barrier
 
-WEEKDAY_WAGE = config.get_weekday_wage()
-WEEKEND_WAGE = config.get_weekend_wage()
-TRANSIT_FEE = config.get_transit_fee()
+WEEKDAY_WAGE = config.weekday_wage
+WEEKEND_WAGE = config.weekend_wage
+TRANSIT_FEE = config.transit_fee
 
 class BaitoManage:
     @classmethod
-    def initialize_csv(cls, year_month: str) -> None:
+    @timed()
+    def initialize_csv(cls, year_month: str, worker: str | None = None) -> None:
         """
         Initialize the csv file for worktime management.
         Can be called without checking if the file already exists.
 
         Args:
             year_month (str): year and month in "yyyy-mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
         """
-        try:
-            if not year_month:
-                csv_file = f"worktime_info/{FILE_FORMAT}{get_current_date()}.csv"
-            else:
-                csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-            pd.read_csv(csv_file)
-        except FileNotFoundError:
-            df = pd.DataFrame(columns=COLUMNS)
-            df.to_csv(csv_file, index=False)
-        print("initialized.")
+        if not year_month:
+            year_month = get_current_date()
+        get_shift_store(worker).ensure(year_month)
+        log_event("initialized", year_month=year_month, worker=worker)
 
     @classmethod
-    def add_entry(cls, year_month: str, day: str, start_time: str, end_time: str) -> int:
+    @timed()
+    def add_entry(cls, year_month: str, day: str, start_time: str, end_time: str, worker: str | None = None) -> int:
         """
         Add an entry to the worktime csv file.
+        An end time at or before the start time ends on the next day (e.g. 22:00 - 02:00).
 
         Args:
             year_month (str): year and month in "yyyy-mm" format.
             day (str): day in "dd" format.
             start_time (str): start time in "hh:mm" format.
             end_time (str): end time in "hh:mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
             int: 0 if successful, -1 if invalid year/month or day, -2 if entry with the same date already exists. -3 if invalid start/end time.
+                -4 if the shift overlaps the shift of another date (e.g. an overnight shift of the previous day).
         """
-        cls.initialize_csv(year_month)
+        if not is_year_month(year_month):
+            print("\nInvalid year/month or day.")
+            return -1
+        cls.initialize_csv(year_month, worker)
+        store = get_shift_store(worker)
         date = f"{year_month}-{day}"
-        if start_time.split(":")[0] > end_time.split(":")[0] and start_time.split(":")[1] >= end_time.split(":")[1]:
+        try:
+            start_minute, end_minute = parse_shift(start_time, end_time)
+        except ValueError:
             print("\nInvalid start/end time.")
             return -3
-        
-        start_time = f"{int(start_time.split(':')[0]):02d}:{int(start_time.split(':')[1]):02d}"
-        end_time = f"{int(end_time.split(':')[0]):02d}:{int(end_time.split(':')[1]):02d}"
+
+        start_time = format_minutes(start_minute)
+        end_time = format_minutes(end_minute)
             
         new_entry = {
             "date": date,
             "start_time": start_time,
             "end_time": end_time
         }
-        csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-    
+
         try:
-            df = pd.read_csv(csv_file)
-            if date in df['date'].values:
-                print("\nEntry with the same date already exists.")
-                return -2
-            with open(csv_file, "a", newline="") as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=COLUMNS)
-                writer.writerow(new_entry)
-                print(f"\n{date}  {start_time} - {end_time}\nEntry added successfully")
+            # no other program can add the same date between the checks and the append
+            with store.lock(year_month):
+                if store.contains(year_month, date):
+                    print("\nEntry with the same date already exists.")
+                    return -2
+                overlapping_date = store.find_overlap(year_month, date, start_minute, end_minute)
+                if overlapping_date is not None:
+                    print(f"\nShift overlaps the entry of {overlapping_date}.")
+                    return -4
+                store.append(year_month, new_entry)
+            print(f"\n{date}  {start_time} - {end_time}\nEntry added successfully")
             return 0
         except:
             print("\nInvalid year/month or day.")
@@ -90,76 +105,51 @@ class BaitoManage:
         
 
     @classmethod
-    def remove_entry(cls, year_month: str, day: str) -> int:
+    @timed()
+    def remove_entry(cls, year_month: str, day: str, worker: str | None = None) -> int:
         """
         Remove an entry from the worktime csv file.
 
         Args:
             year_month (str): year and month in "yyyy-mm" format.
             day (str): day in "dd" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
             int: 0 if successful, -1 if invalid year/month or day.
         """
-        csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-        try:
-            pd.read_csv(csv_file)
-            with open(csv_file, "a", newline="") as csvfile:
-                df_remove = pd.read_csv(csv_file)
-                df_remove.set_index("date", inplace=True)
-                date = f"{year_month}-{day}"
-                removed = df_remove.drop(date)
-                print(removed)
-                removed.to_csv(csv_file, index=True)
-                print("\nEntry successfully removed.")
-                return 0
-        except KeyError or FileNotFoundError:
+        date = f"{year_month}-{day}"
+        if not get_shift_store(worker).remove(year_month, date):
             print("\nInvalid year/month or day.")
             return -1
+        print("\nEntry successfully removed.")
+        return 0
 
     @classmethod
-    def get_monthly_pay(cls, year_month: str, returntype: str = "int") -> int | str:
+    @timed()
+    def get_monthly_pay(cls, year_month: str, returntype: str = "int", worker: str | None = None) -> int | str:
         """
         Calculate total paying for the queried month.
 
         Args:
             year_month (str): year and month in "yyyy-mm" format.
             returntype (str, optional): data type of return value ("str" or "int"). Defaults to "int".
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
-            int | str: total paying for the queried month.
+            int | str: total paying for the queried month. None if year_month is not a valid month.
         """
-        cls.initialize_csv(year_month)
-        csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-        try:
-            df = pd.read_csv(csv_file, names=COLUMNS, header=0)
-        except FileNotFoundError:
+        if not is_year_month(year_month):
+            print("Invalid date or filename.")
+            return None
+        cls.initialize_csv(year_month, worker)
+        store = get_shift_store(worker)
+        totals = store.get_totals(year_month)
+        if totals is None:
             print("Invalid date or filename.")
             return None
 
-        total_paying = 0
-        for i, row in df.iterrows():
-            if pd.to_datetime(row["date"], format=DATE_FORMAT).weekday() != 5:
-                base_wage = WEEKDAY_WAGE
-            else:
-                base_wage = WEEKEND_WAGE
-
-            if pd.to_datetime(row["end_time"], format=TIME_FORMAT).time() > datetime.strptime(TIME_BARRIER, TIME_FORMAT).time():
-                before_ten = (datetime.strptime(TIME_BARRIER, TIME_FORMAT)
-                              - pd.to_datetime(row["start_time"], format=TIME_FORMAT))
-                after_ten = (pd.to_datetime(row["end_time"], format=TIME_FORMAT)
-                             - datetime.strptime(TIME_BARRIER, TIME_FORMAT))
-                before_ten_paying = int(before_ten.total_seconds())/(60**2) * base_wage
-                after_ten_paying = int(int(after_ten.total_seconds())/(60**2) * base_wage * 1.25)
-                daily_paying = before_ten_paying + after_ten_paying
-                # print(str(before_ten.total_seconds() / (60 ** 2)))
-                # print(str(after_ten.total_seconds() / (60 ** 2)))
-            else:
-                work_time = (pd.to_datetime(row["end_time"], format=TIME_FORMAT)
-                             - pd.to_datetime(row["start_time"], format=TIME_FORMAT))
-                daily_paying = work_time.total_seconds() * base_wage/(60**2)
-            # print(thousands_separators(daily_paying))
-            total_paying += daily_paying + (2*TRANSIT_FEE)
+        total_paying = totals.pay if totals.days else 0
         formatted_total_paying = str(thousands_separators(int(total_paying)))
         print(f"\nTotal paying: {formatted_total_paying} yen")
         if returntype == "int":
@@ -168,23 +158,21 @@ class BaitoManage:
             return formatted_total_paying
     
     @classmethod
-    def get_yearly_pay(cls, year: str, returntype: str = "int") -> int | str:
+    @timed()
+    def get_yearly_pay(cls, year: str, returntype: str = "int", worker: str | None = None) -> int | str:
         """
         Calculate total paying for the queried year.
 
         Args:
             year (str): year in "yyyy" format.
             returntype (str): data type of return value ("str" or "int"). Defaults to "int".
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
             int | str: total paying for the queried year.
         """
-        total_paying = 0
-        for month in range(1, 13):
-            year_month = f"{year}-{month:02d}"
-            monthly_paying = cls.get_monthly_pay(year_month, returntype="int")
-            if monthly_paying:
-                total_paying += monthly_paying
+        summary = cls.get_pay_summary(f"{year}-01", f"{year}-12", worker)
+        total_paying = summary["total"]["pay"]
         formatted_total_paying = str(thousands_separators(int(total_paying)))
         print(f"\nTotal paying for {year}: {formatted_total_paying} yen")
         if returntype == "int":
@@ -193,52 +181,231 @@ class BaitoManage:
             return formatted_total_paying
     
     @classmethod
-    def get_workdays_list(cls, year: str, month: str) -> list[str]:
+    @timed()
+    def get_pay_summary(cls, start_year_month: str, end_year_month: str, worker: str | None = None) -> dict:
+        """
+        Collect paying, workhours and workday count for every month in the queried range.
+        Only months that have a csv file are read, and no file is created.
+        Each month is calculated once and kept up to date by the shift store, so repeated queries are cheap.
+
+        Args:
+            start_year_month (str): first month in "yyyy-mm" format.
+            end_year_month (str): last month in "yyyy-mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+        Returns:
+            dict: {"months": {"yyyy-mm": totals}, "years": {"yyyy": totals}, "total": totals}
+                where totals is {"pay": float, "hours": float, "days": int}.
+        """
+        store = get_shift_store(worker)
+        summary = {"months": {}, "years": {}, "total": {"pay": 0, "hours": 0, "days": 0}}
+        for year_month in store.list_months(start_year_month, end_year_month):
+            month_totals = store.get_totals(year_month)
+            if month_totals is None:
+                continue
+            totals = {"pay": month_totals.pay, "hours": month_totals.minutes / 60, "days": month_totals.days}
+            summary["months"][year_month] = totals
+            year_totals = summary["years"].setdefault(year_month[:4], {"pay": 0, "hours": 0, "days": 0})
+            for totals_to_update in (year_totals, summary["total"]):
+                for key, value in totals.items():
+                    totals_to_update[key] += value
+        return summary
+
+    @classmethod
+    @timed()
+    def get_workers_pay_summary(cls, start_year_month: str, end_year_month: str,
+                                workers: list[str] | None = None) -> dict[str, dict]:
+        """
+        Collect the pay summary of several workers in one batch.
+        The workers are summarized one after another in this process, so that their months stay in the shift
+        stores and repeated queries are served from memory (see payroll_batch for a multi-process payroll).
+
+        Args:
+            start_year_month (str): first month in "yyyy-mm" format.
+            end_year_month (str): last month in "yyyy-mm" format.
+            workers (list[str] | None, optional): names of the workers. The default worker and every worker
+                with data if None. Defaults to None.
+
+        Returns:
+            dict[str, dict]: summary of each worker (see get_pay_summary), keyed by worker name
+                ("" for the default worker).
+        """
+        if workers is None:
+            workers = [DEFAULT_WORKER] + list_workers()
+        return {worker: cls.get_pay_summary(start_year_month, end_year_month, worker) for worker in workers}
+
+    @classmethod
+    @timed()
+    def get_workdays_list(cls, year: str, month: str, worker: str | None = None) -> list[str]:
         """
         Get the list of workdays in the queried month.
 
         Args:
             year (str): year in "yyyy" format.
             month (str): month in "mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
-            list[str]: list of workdays in the queried month.
+            list[str]: list of workdays in the queried month. None if the month is not valid.
         """
         year_month = f"{year}-{month}"
-        cls.initialize_csv(year_month)
-        csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-        try:
-            df = pd.read_csv(csv_file, names=COLUMNS, header=0)
-        except FileNotFoundError:
+        if not is_year_month(year_month):
+            print("Invalid date or filename.")
+            return None
+        cls.initialize_csv(year_month, worker)
+        store = get_shift_store(worker)
+        shifts = store.load(year_month)
+        if shifts is None:
             print("Invalid date or filename.")
             return None
 
-        workdays = df["date"].tolist()
+        workdays = shifts.dates()
         return workdays
     
     @classmethod
-    def get_workhours_list(cls, year: str, month: str) -> list[tuple[str, str]]:
+    @timed()
+    def get_workhours_list(cls, year: str, month: str, worker: str | None = None) -> list[tuple[str, str]]:
         """
         Get the list of workhours in the queried month.
 
         Args:
             year (str): year in "yyyy" format.
             month (str): month in "mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
 
         Returns:
             list[tuple[str, str]]: list of workhours in the queried month. e.g. [("hh:mm", "hh:mm"), ...]
+                None if the month is not valid.
         """
         year_month = f"{year}-{int(month):02d}"
-        cls.initialize_csv(year_month)
-        csv_file = f"worktime_info/{FILE_FORMAT}{year_month}.csv"
-        try:
-            df = pd.read_csv(csv_file, names=COLUMNS, header=0)
-        except FileNotFoundError:
+        if not is_year_month(year_month):
+            print("Invalid date or filename.")
+            return None
+        cls.initialize_csv(year_month, worker)
+        store = get_shift_store(worker)
+        shifts = store.load(year_month)
+        if shifts is None:
             print("Invalid date or filename.")
             return None
 
         workhours = []
-        for _, row in df.iterrows():
-            work_time = (row["start_time"], row["end_time"])
-            workhours.append(work_time)
+        for _, start_time, end_time in shifts.rows():
+            workhours.append((start_time, end_time))
         return workhours
+
+    @classmethod
+    @timed()
+    def get_workday_details(cls, start_year_month: str, end_year_month: str,
+                            worker: str | None = None) -> list[tuple[str, str, str, float, float]]:
+        """
+        Get every workday in the queried range together with its workhours and paying in a single query.
+        Only months that exist are read, and no file is created.
+
+        Args:
+            start_year_month (str): first month in "yyyy-mm" format.
+            end_year_month (str): last month in "yyyy-mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+        Returns:
+            list[tuple[str, str, str, float, float]]: (date, start time, end time, hours, paying including
+                transit fee) of each workday, sorted by date.
+        """
+        store = get_shift_store(worker)
+        details = []
+        for year_month in store.list_months(start_year_month, end_year_month):
+            shifts = store.load(year_month)
+            if shifts is not None:
+                details.extend(calculate_daily_details(shifts, store.profile))
+        details.sort()
+        return details
+
+    @classmethod
+    @timed()
+    def get_workday_frame(cls, start_year_month: str, end_year_month: str, worker: str | None = None) -> "pd.DataFrame":
+        """
+        Get every workday in the queried range as a dataframe for bulk analytics, with the paying of all rows
+        calculated at once. Requires pandas and numpy; nothing else in this class does.
+
+        Args:
+            start_year_month (str): first month in "yyyy-mm" format.
+            end_year_month (str): last month in "yyyy-mm" format.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+        Returns:
+            pd.DataFrame: the configured COLUMNS plus "hours" and "pay" (including transit fee), sorted by date.
+        """
+        import pandas as pd
+        store = get_shift_store(worker)
+        months = [store.load(year_month) for year_month in store.list_months(start_year_month, end_year_month)]
+        frames = [shifts.to_frame() for shifts in months if shifts is not None]
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS, dtype=str)
+        return calculate_frame_details(df, store.profile).sort_values("date", ignore_index=True)
+
+    @classmethod
+    @timed()
+    def archive_months(cls, end_year_month: str | None = None, worker: str | None = None) -> list[str]:
+        """
+        Convert finished months to the binary archive format, which is read without parsing text.
+        Archived months can still be changed; they are converted back to csv when that happens.
+
+        Args:
+            end_year_month (str | None, optional): last month to convert in "yyyy-mm" format.
+                The month before the current one if None. Defaults to None.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+        Returns:
+            list[str]: converted months in "yyyy-mm" format.
+        """
+        if end_year_month is None:
+            year, month = map(int, get_current_date().split("-"))
+            end_year_month = f"{year - 1}-12" if month == 1 else f"{year}-{month - 1:02d}"
+        store = get_shift_store(worker)
+        return [year_month for year_month in store.list_months(None, end_year_month) if store.archive(year_month)]
+
+    @classmethod
+    @timed()
+    def import_entries(cls, path: str, file_format: str | None = None, worker: str | None = None,
+                       replace: bool = False) -> dict:
+        """
+        Import many entries from a csv or JSON Lines file (see shift_transfer), reading and writing each month once.
+
+        Args:
+            path (str): path of the file, or "-" for stdin.
+            file_format (str | None, optional): "csv" or "jsonl". Detected from the extension if None. Defaults to None.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+            replace (bool, optional): replace existing entries of the same dates. Defaults to False.
+
+        Returns:
+            dict: {"added": int, "months": int, "rejected": [(line number, date, reason), ...]}
+        """
+        file_format = file_format or detect_format(path)
+        if path == "-":
+            report = import_shifts(sys.stdin, file_format, worker, replace)
+        else:
+            with open(path, newline="") as import_file:
+                report = import_shifts(import_file, file_format, worker, replace)
+        print(f"\n{report['added']} entries added to {report['months']} month(s), {len(report['rejected'])} rejected.")
+        return report
+
+    @classmethod
+    @timed()
+    def export_entries(cls, path: str, start_year_month: str, end_year_month: str, file_format: str | None = None,
+                       worker: str | None = None) -> int:
+        """
+        Export every entry of a range of months to a csv or JSON Lines file (see shift_transfer), sorted by date.
+
+        Args:
+            path (str): path of the file, or "-" for stdout.
+            start_year_month (str): first month in "yyyy-mm" format.
+            end_year_month (str): last month in "yyyy-mm" format.
+            file_format (str | None, optional): "csv" or "jsonl". Detected from the extension if None. Defaults to None.
+            worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+        Returns:
+            int: number of exported entries.
+        """
+        file_format = file_format or detect_format(path)
+        if path == "-":
+            return export_shifts(sys.stdout, start_year_month, end_year_month, file_format, worker)
+        with open(path, "w", newline="") as export_file:
+            return export_shifts(export_file, start_year_month, end_year_month, file_format, worker)
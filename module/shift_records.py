@@ -0,0 +1,327 @@
+"""
+Module for the in-memory form of worktime data.
+A month is held as three columns of small integers instead of a dataframe of strings: the day of the month
+in an array('B') and the start and end minute since midnight in array('H'), i.e. 5 bytes per shift.
+Dates and times are only formatted back to strings when they leave the program (csv files, lists for the UI).
+
+A shift is a half-open interval of minutes [start, end) counted from midnight of its date. A shift that ends at
+or before its start time ends on the next day (e.g. 22:00-02:00 is [1320, 1560)), so a shift can last up to a
+whole day and belongs to the date it starts on.
+"""
+from __future__ import annotations
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from typing import Iterable, Iterator, Sequence
+from module.baito_configuration import get_config
+from module.utils import lazy_import
+
+pd = lazy_import("pandas")
+
+config = get_config()
+
+COLUMNS = config.columns
+
+MINUTES_PER_DAY = 24 * 60
+
+_YEAR_MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def is_year_month(text: str) -> bool:
+    """
+    Check if a text is a year and month as used in the storage, e.g. in the name of a month file.
+
+    Args:
+        text (str): text to check.
+
+    Returns:
+        bool: True if text is in "yyyy-mm" format with a month of 01-12.
+    """
+    return _YEAR_MONTH_PATTERN.fullmatch(text) is not None
+
+
+def parse_minutes(time: str) -> int:
+    """
+    Convert a time to minutes since midnight.
+
+    Args:
+        time (str): time in "hh:mm" format (the hour may have a single digit).
+
+    Returns:
+        int: minutes since midnight.
+    """
+    hour, minute = time.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def format_minutes(minutes: int) -> str:
+    """
+    Convert minutes since midnight to a time.
+
+    Args:
+        minutes (int): minutes since midnight.
+
+    Returns:
+        str: time in "hh:mm" format.
+    """
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+def to_interval(start_minute: int, end_minute: int) -> tuple[int, int]:
+    """
+    Convert the start and end time of a shift to its interval, moving an end time at or before the start time
+    to the next day.
+
+    Args:
+        start_minute (int): start time in minutes since midnight.
+        end_minute (int): end time in minutes since midnight.
+
+    Returns:
+        tuple[int, int]: start and end minute, counted from midnight of the date of the shift.
+    """
+    if end_minute <= start_minute:
+        end_minute += MINUTES_PER_DAY
+    return start_minute, end_minute
+
+
+def parse_shift(start_time: str, end_time: str) -> tuple[int, int]:
+    """
+    Validate the start and end time of a shift entered by the user and convert them to its interval.
+
+    Args:
+        start_time (str): start time in "hh:mm" format (00:00-23:59).
+        end_time (str): end time in "hh:mm" format (00:00-24:00). On the next day if at or before start_time.
+
+    Raises:
+        ValueError: if a time is malformed or out of range, or both times are the same.
+
+    Returns:
+        tuple[int, int]: start and end minute, counted from midnight of the date of the shift.
+    """
+    minutes = []
+    for time, last_hour in ((start_time, 23), (end_time, 24)):
+        hour, separator, minute = time.strip().partition(":")
+        if not (separator and hour.isdigit() and minute.isdigit() and len(minute) <= 2
+                and int(hour) <= last_hour and int(minute) < 60):
+            raise ValueError(f"Invalid time: {time}")
+        minutes.append(int(hour) * 60 + int(minute))
+    start_minute, end_minute = minutes
+    if end_minute == start_minute or end_minute > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid shift: {start_time}-{end_time}")
+    return to_interval(start_minute, end_minute)
+
+
+def parse_day(date: str) -> int:
+    """
+    Get the day of the month of a date.
+
+    Args:
+        date (str): date in "yyyy-mm-dd" format.
+
+    Returns:
+        int: day of the month.
+    """
+    return int(date.rsplit("-", 1)[1])
+
+
+def add_months(year_month: str, months: int) -> str:
+    """
+    Get the month a number of months before or after a month.
+
+    Args:
+        year_month (str): year and month in "yyyy-mm" format.
+        months (int): number of months to add (negative for earlier months).
+
+    Returns:
+        str: year and month in "yyyy-mm" format.
+    """
+    year, month = divmod(int(year_month[:4]) * 12 + int(year_month[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+class MonthShifts:
+    """
+    Shifts of a single month, one row per workday, in the order they were added.
+    An interval index of the shifts (their intervals in minutes since the start of the month, sorted by start)
+    is built on the first overlap query and kept up to date by append, so that later queries are a binary search.
+    """
+    __slots__ = ("year_month", "days", "start_minutes", "end_minutes", "first_weekday", "days_in_month",
+                 "_index_starts", "_index_ends")
+
+    def __init__(self, year_month: str):
+        year, month = year_month.split("-")
+        # also rejects invalid months such as "2024-13"
+        self.first_weekday, self.days_in_month = monthrange(int(year), int(month))
+        self.year_month = year_month
+        self.days = array("B")
+        self.start_minutes = array("H")
+        self.end_minutes = array("H")
+        self._index_starts: list[int] | None = None
+        self._index_ends: list[int] | None = None
+
+    @classmethod
+    def from_rows(cls, year_month: str, rows: Iterable[Sequence[str]]) -> MonthShifts:
+        """
+        Build the shifts of a month from rows of strings, e.g. the rows of a csv file.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            rows (Iterable[Sequence[str]]): (date, start time, end time) of each shift.
+
+        Returns:
+            MonthShifts: shifts of the month.
+        """
+        shifts = cls(year_month)
+        for date, start_time, end_time in rows:
+            shifts.append(parse_day(date), *to_interval(parse_minutes(start_time), parse_minutes(end_time)))
+        return shifts
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __iter__(self) -> Iterator[tuple[int, int, int]]:
+        return zip(self.days, self.start_minutes, self.end_minutes)
+
+    def __contains__(self, day: int) -> bool:
+        return day in self.days
+
+    def get_date(self, day: int) -> str:
+        """
+        Get the date of a day of this month.
+
+        Args:
+            day (int): day of the month.
+
+        Returns:
+            str: date in "yyyy-mm-dd" format.
+        """
+        return f"{self.year_month}-{day:02d}"
+
+    def get_weekday(self, day: int) -> int:
+        """
+        Get the weekday of a day of this month without building a date object.
+
+        Args:
+            day (int): day of the month.
+
+        Returns:
+            int: weekday (0 = Monday, 6 = Sunday).
+        """
+        return (self.first_weekday + day - 1) % 7
+
+    def dates(self) -> list[str]:
+        """
+        Get the dates of every shift.
+
+        Returns:
+            list[str]: dates in "yyyy-mm-dd" format.
+        """
+        return [self.get_date(day) for day in self.days]
+
+    def rows(self) -> Iterator[tuple[str, str, str]]:
+        """
+        Iterate over the shifts as strings, in the configured COLUMNS order.
+
+        Returns:
+            Iterator[tuple[str, str, str]]: (date, start time, end time) of each shift.
+        """
+        for day, start_minute, end_minute in self:
+            yield self.get_date(day), format_minutes(start_minute), format_minutes(end_minute)
+
+    def append(self, day: int, start_minute: int, end_minute: int) -> None:
+        """
+        Add a shift. The caller makes sure that the day has no shift yet.
+
+        Args:
+            day (int): day of the month.
+            start_minute (int): start time in minutes since midnight.
+            end_minute (int): end time in minutes since midnight of the day, after 24:00 if it ends on the next day.
+
+        Raises:
+            ValueError: if the day does not exist in the month or the shift is not a valid interval (see to_interval).
+        """
+        if not 1 <= day <= self.days_in_month:
+            raise ValueError(f"Invalid day for {self.year_month}: {day}")
+        if not 0 <= start_minute < MINUTES_PER_DAY or not start_minute < end_minute <= start_minute + MINUTES_PER_DAY:
+            raise ValueError(f"Invalid shift for {self.get_date(day)}: {start_minute}-{end_minute}")
+        self.days.append(day)
+        self.start_minutes.append(start_minute)
+        self.end_minutes.append(end_minute)
+        if self._index_starts is not None:
+            offset = (day - 1) * MINUTES_PER_DAY
+            index = bisect_right(self._index_starts, offset + start_minute)
+            self._index_starts.insert(index, offset + start_minute)
+            self._index_ends.insert(index, offset + end_minute)
+
+    def find_overlap(self, start: int, end: int) -> int | None:
+        """
+        Find a shift that overlaps an interval in O(log n), using the interval index.
+        Shifts of a month never overlap each other, so the index sorted by start is also sorted by end.
+
+        Args:
+            start (int): start of the interval in minutes since the start of the month (may be negative).
+            end (int): end of the interval in minutes since the start of the month (may be after the month).
+
+        Returns:
+            int | None: day of an overlapping shift, or None if no shift overlaps.
+        """
+        if self._index_starts is None:
+            intervals = sorted(((day - 1) * MINUTES_PER_DAY + start_minute, (day - 1) * MINUTES_PER_DAY + end_minute)
+                               for day, start_minute, end_minute in self)
+            self._index_starts = [interval_start for interval_start, _ in intervals]
+            self._index_ends = [interval_end for _, interval_end in intervals]
+        # the first shift that ends after the interval starts is the only candidate
+        index = bisect_right(self._index_ends, start)
+        if index < len(self._index_starts) and self._index_starts[index] < end:
+            return self._index_starts[index] // MINUTES_PER_DAY + 1
+        return None
+
+    def remove(self, day: int) -> MonthShifts | None:
+        """
+        Remove the shift of a day.
+
+        Args:
+            day (int): day of the month.
+
+        Returns:
+            MonthShifts | None: the removed shift, or None if the day has no shift.
+        """
+        try:
+            index = self.days.index(day)
+        except ValueError:
+            return None
+        removed = MonthShifts(self.year_month)
+        removed.append(self.days.pop(index), self.start_minutes.pop(index), self.end_minutes.pop(index))
+        if self._index_starts is not None:
+            index = bisect_left(self._index_starts, (day - 1) * MINUTES_PER_DAY + removed.start_minutes[0])
+            del self._index_starts[index], self._index_ends[index]
+        return removed
+
+    def copy(self) -> MonthShifts:
+        """
+        Copy the shifts, e.g. to change them without affecting readers of the original.
+
+        Returns:
+            MonthShifts: independent copy.
+        """
+        shifts = MonthShifts.__new__(MonthShifts)
+        shifts.year_month = self.year_month
+        shifts.first_weekday = self.first_weekday
+        shifts.days_in_month = self.days_in_month
+        shifts.days = array("B", self.days)
+        shifts.start_minutes = array("H", self.start_minutes)
+        shifts.end_minutes = array("H", self.end_minutes)
+        shifts._index_starts = None if self._index_starts is None else self._index_starts.copy()
+        shifts._index_ends = None if self._index_ends is None else self._index_ends.copy()
+        return shifts
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert the shifts to a dataframe of strings with the configured COLUMNS, for bulk analytics.
+        Requires pandas.
+
+        Returns:
+            pd.DataFrame: worktime data.
+        """
+        return pd.DataFrame(list(self.rows()), columns=COLUMNS, dtype=str)
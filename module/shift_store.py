@@ -0,0 +1,411 @@
+"""
+Module for keeping the worktime data in memory.
+Each month is read once from the storage backend and served from memory afterwards; every change is
+written through to the backend. A month is re-read when it is changed by another program (detected by
+the signature of the backend, e.g. the inode, mtime and size of a csv file).
+Every change holds the storage lock of its month (see ShiftStorage.lock) from the check to the write, so
+programs writing the same month at the same time never lose each other's changes.
+Aggregated totals of each month are kept alongside the data and updated incrementally on every change.
+When a month changed by another program is re-read with the same entries, the kept totals are checked against
+the full recalculation and a difference is logged as a "totals_mismatch" event (see instrumentation).
+There is one store per worker, shared by the whole process (see get_shift_store).
+"""
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from module.baito_configuration import get_config
+from module.instrumentation import count, log_event
+from module.pay_calculation import MonthTotals, WageProfile, calculate_totals, get_wage_profile
+from module.shift_records import (MINUTES_PER_DAY, MonthShifts, add_months, is_year_month, parse_day, parse_minutes,
+                                  to_interval)
+from module.storage import ShiftStorage, create_storage, validate_worker
+
+config = get_config()
+
+COLUMNS = config.columns
+
+
+class _CachedMonth:
+    """
+    Worktime data and totals of a single month together with the storage signature it was read with.
+    """
+    __slots__ = ("shifts", "totals", "signature")
+
+    def __init__(self, shifts: MonthShifts, totals: MonthTotals, signature):
+        self.shifts = shifts
+        self.totals = totals
+        self.signature = signature
+
+
+class ShiftStore:
+    def __init__(self, storage: ShiftStorage | None = None, profile: WageProfile | None = None):
+        self.storage = storage if storage is not None else create_storage()
+        self.profile = profile if profile is not None else get_wage_profile()
+        self._months: dict[str, _CachedMonth] = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def lock(self, year_month: str) -> Iterator[None]:
+        """
+        Hold the lock of this store and the storage lock of a month (see ShiftStorage.lock), e.g. to check an
+        entry and add it without another thread or process changing the month in between.
+        Always taken in this order, so that threads and processes never wait for each other in a cycle.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+        """
+        with self._lock, self.storage.lock(year_month):
+            yield
+
+    def exists(self, year_month: str) -> bool:
+        """
+        Check if the queried month exists in the storage.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            bool: True if the month exists.
+        """
+        return self.storage.get_signature(year_month) is not None
+
+    def list_months(self, start_year_month: str | None = None, end_year_month: str | None = None) -> list[str]:
+        """
+        Get the months that exist in the storage. Nothing is created by this method.
+
+        Args:
+            start_year_month (str | None, optional): first month in "yyyy-mm" format. Unbounded if None. Defaults to None.
+            end_year_month (str | None, optional): last month in "yyyy-mm" format. Unbounded if None. Defaults to None.
+
+        Returns:
+            list[str]: months in "yyyy-mm" format, in ascending order.
+        """
+        return self.storage.list_months(start_year_month, end_year_month)
+
+    def ensure(self, year_month: str) -> None:
+        """
+        Create the queried month as an empty month if it does not exist yet.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Raises:
+            ValueError: if year_month is not a valid month, so that no file of it is created.
+        """
+        if not is_year_month(year_month):
+            raise ValueError(f"Invalid year/month: {year_month}")
+        if self.exists(year_month):
+            return
+        with self.lock(year_month):
+            if not self.exists(year_month):
+                self.storage.create(year_month)
+
+    def load(self, year_month: str) -> MonthShifts | None:
+        """
+        Get the worktime data of the queried month.
+        The returned shifts are shared by every caller and must not be modified. The store itself never
+        modifies them either (changes replace them with a changed copy), so they can be read without the lock.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            MonthShifts | None: shifts of the month, or None if the month does not exist.
+        """
+        cached = self._get_cached(year_month)
+        return None if cached is None else cached.shifts
+
+    def contains(self, year_month: str, date: str) -> bool:
+        """
+        Check if an entry of the queried date exists.
+        The month is loaded, as adding an entry needs it for the overlap check (see find_overlap) anyway.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            date (str): date in "yyyy-mm-dd" format.
+
+        Returns:
+            bool: True if the entry exists.
+        """
+        cached = self._get_cached(year_month)
+        return cached is not None and parse_day(date) in cached.shifts
+
+    def find_overlap(self, year_month: str, date: str, start_minute: int, end_minute: int,
+                     neighbours_only: bool = False) -> str | None:
+        """
+        Find an entry whose shift overlaps a new shift, including overnight shifts of the previous day and
+        shifts of the neighbouring months.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            date (str): date of the new shift in "yyyy-mm-dd" format.
+            start_minute (int): start time in minutes since midnight.
+            end_minute (int): end time in minutes since midnight, after 24:00 if the shift ends on the next day.
+            neighbours_only (bool, optional): only check the previous and next month. Defaults to False.
+
+        Returns:
+            str | None: date of an overlapping entry in "yyyy-mm-dd" format, or None if there is none.
+        """
+        day = parse_day(date)
+        days_in_month = MonthShifts(year_month).days_in_month
+        start, end = (day - 1) * MINUTES_PER_DAY + start_minute, (day - 1) * MINUTES_PER_DAY + end_minute
+        # (month, offset of the new shift in the minutes of that month)
+        candidates = [] if neighbours_only else [(year_month, 0)]
+        if day == 1:
+            previous_month = add_months(year_month, -1)
+            candidates.append((previous_month, MonthShifts(previous_month).days_in_month * MINUTES_PER_DAY))
+        if end > days_in_month * MINUTES_PER_DAY:
+            candidates.append((add_months(year_month, 1), -days_in_month * MINUTES_PER_DAY))
+        with self._lock:
+            for candidate, offset in candidates:
+                cached = self._get_cached(candidate)
+                overlap = None if cached is None else cached.shifts.find_overlap(start + offset, end + offset)
+                if overlap is not None:
+                    return cached.shifts.get_date(overlap)
+        return None
+
+    def get_totals(self, year_month: str) -> MonthTotals | None:
+        """
+        Get the aggregated totals of the queried month without recalculating them.
+        The returned object is shared by every caller and must not be modified.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            MonthTotals | None: totals of the month, or None if the month does not exist.
+        """
+        cached = self._get_cached(year_month)
+        return None if cached is None else cached.totals
+
+    def _get_current(self, year_month: str, signature) -> _CachedMonth | None:
+        cached = self._months.get(year_month)
+        return cached if cached is not None and cached.signature == signature else None
+
+    def _verify_totals(self, year_month: str, cached: _CachedMonth, shifts: MonthShifts, totals: MonthTotals) -> None:
+        """
+        Check the incrementally kept totals of a month that changed outside of this store against the full
+        recalculation. Only meaningful if the entries themselves are unchanged (e.g. the file was only touched or
+        rewritten with the same rows); a difference then means the incremental totals drifted, which is logged.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            cached (_CachedMonth): month as kept by this store.
+            shifts (MonthShifts): month as read again from the storage.
+            totals (MonthTotals): totals recalculated from shifts.
+        """
+        if sorted(cached.shifts) != sorted(shifts) or totals.is_close(cached.totals):
+            return
+        log_event("totals_mismatch", year_month=year_month,
+                  kept=cached.totals.as_dict(), recalculated=totals.as_dict())
+
+    def _get_cached(self, year_month: str) -> _CachedMonth | None:
+        with self._lock:
+            signature = self.storage.get_signature(year_month)
+            if signature is None:
+                self._months.pop(year_month, None)
+                return None
+            cached = self._months.get(year_month)
+            if cached is None or cached.signature != signature:
+                # first access, or the month was changed outside of this store: recalculate everything
+                count("store.miss")
+                shifts = self.storage.read(year_month)
+                totals = self.storage.calculate_totals(year_month, shifts, self.profile)
+                if cached is not None:
+                    self._verify_totals(year_month, cached, shifts, totals)
+                cached = _CachedMonth(shifts, totals, signature)
+                self._months[year_month] = cached
+            else:
+                count("store.hit")
+            return cached
+
+    def append(self, year_month: str, entry: dict[str, str]) -> None:
+        """
+        Append an entry to the queried month. An existing entry of the same date is replaced.
+        A month that is not loaded yet is changed in the storage only, so it is not loaded just to be changed.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            entry (dict[str, str]): entry with the configured COLUMNS as keys.
+        """
+        day = parse_day(entry["date"])
+        start_minute, end_minute = to_interval(parse_minutes(entry["start_time"]), parse_minutes(entry["end_time"]))
+        new_shift = MonthShifts(year_month)
+        # validates the entry before anything is written
+        new_shift.append(day, start_minute, end_minute)
+        with self.lock(year_month):
+            self.ensure(year_month)
+            self.remove(year_month, entry["date"])
+            cached = self._get_current(year_month, self.storage.get_signature(year_month))
+            self.storage.append(year_month, entry)
+            if cached is None:
+                self._months.pop(year_month, None)
+                return
+            shifts = cached.shifts.copy()
+            shifts.append(day, start_minute, end_minute)
+            cached.shifts = shifts
+            cached.totals.add(calculate_totals(new_shift, self.profile))
+            cached.signature = self.storage.get_signature(year_month)
+
+    def extend(self, year_month: str, new_shifts: MonthShifts, replace: bool = False) -> dict[str, str]:
+        """
+        Add many shifts to the queried month with a single read and a single write of the month.
+        Shifts that cannot be added are skipped and reported; the others are still added.
+        Nothing is written, and a month that does not exist is not created, if every shift is skipped.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            new_shifts (MonthShifts): shifts to add, at most one per day.
+            replace (bool, optional): replace existing entries of the same dates instead of skipping the new
+                shifts. Defaults to False.
+
+        Returns:
+            dict[str, str]: reason of each skipped shift ("duplicate" or "overlaps yyyy-mm-dd"), keyed by date.
+        """
+        skipped = {}
+        with self.lock(year_month):
+            cached = self._get_cached(year_month)
+            shifts = cached.shifts.copy() if cached is not None else MonthShifts(year_month)
+            added = MonthShifts(year_month)
+            for day, start_minute, end_minute in new_shifts:
+                date = shifts.get_date(day)
+                replaced = shifts.remove(day) if replace else None
+                offset = (day - 1) * MINUTES_PER_DAY
+                overlap = None if day in shifts else shifts.find_overlap(offset + start_minute, offset + end_minute)
+                reason = None
+                if day in shifts:
+                    reason = "duplicate"
+                elif overlap is not None:
+                    reason = f"overlaps {shifts.get_date(overlap)}"
+                elif day == 1 or offset + end_minute > shifts.days_in_month * MINUTES_PER_DAY:
+                    overlapping_date = self.find_overlap(year_month, date, start_minute, end_minute,
+                                                         neighbours_only=True)
+                    if overlapping_date is not None:
+                        reason = f"overlaps {overlapping_date}"
+                if reason is not None:
+                    skipped[date] = reason
+                    if replaced is not None:
+                        shifts.append(*next(iter(replaced)))
+                    continue
+                shifts.append(day, start_minute, end_minute)
+                added.append(day, start_minute, end_minute)
+            if not len(added):
+                return skipped
+
+            self.storage.write(year_month, shifts)
+            signature = self.storage.get_signature(year_month)
+            if cached is None:
+                totals = self.storage.calculate_totals(year_month, shifts, self.profile)
+                self._months[year_month] = _CachedMonth(shifts, totals, signature)
+                return skipped
+            if replace:
+                cached.totals = self.storage.calculate_totals(year_month, shifts, self.profile)
+            else:
+                cached.totals.add(calculate_totals(added, self.profile))
+            cached.shifts = shifts
+            cached.signature = signature
+        return skipped
+
+    def remove(self, year_month: str, date: str) -> bool:
+        """
+        Remove the entry of the queried date.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            date (str): date in "yyyy-mm-dd" format.
+
+        Returns:
+            bool: True if an entry was removed, False if the month or the entry does not exist.
+        """
+        with self.lock(year_month):
+            signature = self.storage.get_signature(year_month)
+            if signature is None:
+                return False
+            cached = self._get_current(year_month, signature)
+            if cached is None:
+                self._months.pop(year_month, None)
+                return self.storage.remove_date(year_month, date)
+            shifts = cached.shifts.copy()
+            removed = shifts.remove(parse_day(date))
+            if removed is None:
+                return False
+            cached.totals.add(calculate_totals(removed, self.profile), sign=-1)
+            cached.shifts = shifts
+            self.storage.remove(year_month, date, shifts)
+            cached.signature = self.storage.get_signature(year_month)
+            return True
+
+    def archive(self, year_month: str) -> bool:
+        """
+        Convert a finished month to the binary archive format of the storage, if it has one.
+        The data does not change, so the cached month stays valid.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            bool: True if the month was converted.
+        """
+        with self.lock(year_month):
+            cached = self._get_cached(year_month)
+            if cached is None or not self.storage.archive(year_month, self.profile):
+                return False
+            cached.signature = self.storage.get_signature(year_month)
+            return True
+
+    def invalidate(self, year_month: str | None = None) -> None:
+        """
+        Drop the cached data so that it is read from disk on the next access.
+
+        Args:
+            year_month (str | None, optional): month to drop. Drops every month if None. Defaults to None.
+        """
+        with self._lock:
+            if year_month is None:
+                self._months.clear()
+            else:
+                self._months.pop(year_month, None)
+
+    def set_profile(self, profile: WageProfile) -> None:
+        """
+        Pay the shifts with other wages from now on. The cached totals are dropped if the wages changed.
+
+        Args:
+            profile (WageProfile): wages to pay.
+        """
+        wages = (profile.weekday_wage, profile.weekend_wage, profile.transit_fee)
+        with self._lock:
+            if wages != (self.profile.weekday_wage, self.profile.weekend_wage, self.profile.transit_fee):
+                self.profile = profile
+                self._months.clear()
+
+
+_stores: dict[str, ShiftStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_shift_store(worker: str | None = None) -> ShiftStore:
+    """
+    Get the process-wide shift store of a worker, creating it on first use.
+    The wages of the store follow the configuration, e.g. after reload_config.
+
+    Args:
+        worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+    Returns:
+        ShiftStore: the shift store of the worker, using the worker's wage profile.
+    """
+    worker = validate_worker(worker)
+    with _stores_lock:
+        store = _stores.get(worker)
+        profile = get_wage_profile(worker)
+        if store is None:
+            store = ShiftStore(create_storage(worker=worker), profile)
+            _stores[worker] = store
+        else:
+            store.set_profile(profile)
+        return store
+
+
+shift_store = get_shift_store()
@@ -0,0 +1,182 @@
+"""
+Module for importing and exporting many shifts at once.
+Rows are streamed from and to csv files (with the configured COLUMNS as header) or JSON Lines files (one object
+with the COLUMNS as keys per line), so files of any size are handled without loading them as a whole.
+
+An import validates every row as it is read and groups the valid ones by month into compact MonthShifts, then
+adds each month with a single read and a single write (see ShiftStore.extend) instead of one per row.
+"""
+from __future__ import annotations
+import csv
+import json
+import re
+from typing import IO, Iterable, Iterator
+from module.baito_configuration import get_config
+from module.shift_records import MonthShifts, format_minutes, parse_shift
+from module.shift_store import get_shift_store
+
+config = get_config()
+
+COLUMNS = config.columns
+
+FORMATS = ("csv", "jsonl")
+_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def detect_format(path: str, default: str = "csv") -> str:
+    """
+    Get the file format from the extension of a path.
+
+    Args:
+        path (str): path of the file ("-" for stdin or stdout).
+        default (str, optional): format if the extension is not known. Defaults to "csv".
+
+    Returns:
+        str: "csv" or "jsonl".
+    """
+    if path.endswith((".jsonl", ".json", ".ndjson")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_rows(stream: IO[str], file_format: str = "csv") -> Iterator[tuple[int, dict]]:
+    """
+    Read the rows of a csv or JSON Lines stream one by one.
+
+    Args:
+        stream (IO[str]): text stream to read.
+        file_format (str, optional): "csv" or "jsonl". Defaults to "csv".
+
+    Returns:
+        Iterator[tuple[int, dict]]: line number and row of each entry. A row that is not valid JSON is
+            returned as an empty dict, so that it is reported as invalid.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = {}
+            yield line_number, row if isinstance(row, dict) else {}
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+
+
+def group_rows(rows: Iterable[tuple[int, dict]]) -> tuple[dict[str, MonthShifts], dict[str, int],
+                                                         list[tuple[int, str, str]]]:
+    """
+    Validate rows and group the valid ones by month. Only the first row of a date is kept.
+
+    Args:
+        rows (Iterable[tuple[int, dict]]): line number and row of each entry, with the COLUMNS as keys.
+
+    Returns:
+        tuple[dict[str, MonthShifts], dict[str, int], list[tuple[int, str, str]]]: shifts of each month in
+            "yyyy-mm" format, line number of each valid date, and (line number, date, reason) of every rejected row.
+    """
+    date_column, start_column, end_column = COLUMNS
+    months: dict[str, MonthShifts] = {}
+    line_numbers: dict[str, int] = {}
+    rejected = []
+    for line_number, row in rows:
+        date, start_time, end_time = (str(row.get(column) or "").strip()
+                                      for column in (date_column, start_column, end_column))
+        if not _DATE_PATTERN.fullmatch(date):
+            rejected.append((line_number, date, "invalid date"))
+            continue
+        if date in line_numbers:
+            rejected.append((line_number, date, "duplicate in input"))
+            continue
+        try:
+            start_minute, end_minute = parse_shift(start_time, end_time)
+        except ValueError:
+            rejected.append((line_number, date, "invalid start/end time"))
+            continue
+        year_month = date[:7]
+        shifts = months.get(year_month)
+        try:
+            if shifts is None:
+                shifts = MonthShifts(year_month)
+            shifts.append(int(date[8:]), start_minute, end_minute)
+        except ValueError:
+            rejected.append((line_number, date, "invalid date"))
+            continue
+        months[year_month] = shifts
+        line_numbers[date] = line_number
+    return months, line_numbers, rejected
+
+
+def import_shifts(stream: IO[str], file_format: str = "csv", worker: str | None = None,
+                  replace: bool = False) -> dict:
+    """
+    Import the shifts of a csv or JSON Lines stream. Each month is read and written once.
+    Rows that cannot be added are skipped and reported; the others are still imported.
+
+    Args:
+        stream (IO[str]): text stream to read.
+        file_format (str, optional): "csv" or "jsonl". Defaults to "csv".
+        worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+        replace (bool, optional): replace existing entries of the same dates instead of skipping the imported
+            ones. Defaults to False.
+
+    Returns:
+        dict: {"added": int, "months": int, "rejected": [(line number, date, reason), ...]}, where months is the
+            number of months that were changed.
+    """
+    months, line_numbers, rejected = group_rows(read_rows(stream, file_format))
+    store = get_shift_store(worker)
+    added = 0
+    changed_months = 0
+    for year_month in sorted(months):
+        shifts = months[year_month]
+        skipped = store.extend(year_month, shifts, replace)
+        if len(skipped) < len(shifts):
+            added += len(shifts) - len(skipped)
+            changed_months += 1
+        for date, reason in skipped.items():
+            rejected.append((line_numbers[date], date, reason))
+    return {"added": added, "months": changed_months, "rejected": sorted(rejected)}
+
+
+def export_shifts(stream: IO[str], start_year_month: str, end_year_month: str, file_format: str = "csv",
+                  worker: str | None = None) -> int:
+    """
+    Write every shift of a range of months to a csv or JSON Lines stream, one month at a time.
+
+    Args:
+        stream (IO[str]): text stream to write.
+        start_year_month (str): first month in "yyyy-mm" format.
+        end_year_month (str): last month in "yyyy-mm" format.
+        file_format (str, optional): "csv" or "jsonl". Defaults to "csv".
+        worker (str | None, optional): name of the worker. The default worker if None. Defaults to None.
+
+    Returns:
+        int: number of exported shifts.
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown file format: {file_format}")
+    if file_format == "csv":
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(COLUMNS)
+    store = get_shift_store(worker)
+    count = 0
+    for year_month in store.list_months(start_year_month, end_year_month):
+        shifts = store.load(year_month)
+        if shifts is None:
+            continue
+        for day, start_minute, end_minute in sorted(shifts):
+            row = (shifts.get_date(day), format_minutes(start_minute), format_minutes(end_minute))
+            if file_format == "csv":
+                writer.writerow(row)
+            else:
+                stream.write(json.dumps(dict(zip(COLUMNS, row))) + "\n")
+            count += 1
+    return count
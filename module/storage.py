@@ -0,0 +1,579 @@
+"""
+Module for the storage backends of worktime data.
+A backend only moves rows between memory and disk; caching and totals are handled by the shift store.
+
+Backends:
+    csv: one csv file per month in worktime_info (the original layout).
+        Named workers have their own directory, worktime_info/{worker}.
+    sqlite: a single SQLite database with the shifts indexed by worker and date.
+
+Every backend instance holds the data of one worker. The default worker ("") is the original single-person data.
+"""
+from __future__ import annotations
+import csv
+import io
+import os
+import re
+import threading
+from contextlib import AbstractContextManager, nullcontext
+from typing import Hashable, Iterable, Sequence
+from module.atomic_files import append_line, atomic_write, lock_file, read_complete_lines
+from module.baito_configuration import get_config
+from module.instrumentation import count
+from module.utils import lazy_import
+from module.pay_calculation import MonthTotals, WageProfile, DEFAULT_WAGE_PROFILE, calculate_totals, get_pay_rules
+from module.shift_records import MonthShifts, is_year_month, parse_day
+from module.shift_archive import ARCHIVE_SUFFIX, ArchiveHeader, read_archive, write_archive
+
+sqlite3 = lazy_import("sqlite3")
+
+config = get_config()
+
+FILE_FORMAT = config.file_format
+COLUMNS = config.columns
+CSV_WRITE_MODE = config.csv_write_mode
+STORAGE_BACKEND = config.storage_backend
+SQLITE_PATH = config.sqlite_path
+
+DATA_DIRECTORY = "worktime_info"
+COMPACTION_MIN_DEAD_ROWS = 16
+DEFAULT_WORKER = ""
+_WORKER_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def validate_worker(worker: str | None) -> str:
+    """
+    Check that a worker name can be used as a directory name and configuration key.
+
+    Args:
+        worker (str | None): name of the worker. None for the default worker.
+
+    Raises:
+        ValueError: if the name contains characters other than letters, digits, "_" and "-".
+
+    Returns:
+        str: the worker name, DEFAULT_WORKER for None.
+    """
+    if not worker:
+        return DEFAULT_WORKER
+    if not _WORKER_PATTERN.fullmatch(worker):
+        raise ValueError(f"Invalid worker name: {worker}")
+    return worker
+
+
+class ShiftStorage:
+    """
+    Interface of a storage backend. Every month is identified by its "yyyy-mm" string.
+    """
+
+    def list_months(self, start_year_month: str | None = None, end_year_month: str | None = None) -> list[str]:
+        """
+        Get the months that exist in the storage, without creating anything.
+
+        Args:
+            start_year_month (str | None, optional): first month in "yyyy-mm" format. Unbounded if None. Defaults to None.
+            end_year_month (str | None, optional): last month in "yyyy-mm" format. Unbounded if None. Defaults to None.
+
+        Returns:
+            list[str]: months in "yyyy-mm" format, in ascending order.
+        """
+        raise NotImplementedError
+
+    def get_signature(self, year_month: str) -> Hashable | None:
+        """
+        Get a cheap value that changes whenever the stored month changes.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            Hashable | None: signature of the month, or None if the month does not exist.
+        """
+        raise NotImplementedError
+
+    def lock(self, year_month: str) -> AbstractContextManager:
+        """
+        Get a lock of a month that is held while the month is read, changed and written, so that the writes
+        of other threads and processes are not lost. Backends that change data in transactions need none.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            AbstractContextManager: reentrant lock of the month, used in a with statement.
+        """
+        return nullcontext()
+
+    def read(self, year_month: str) -> MonthShifts:
+        """
+        Read every entry of an existing month.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            MonthShifts: shifts of the month.
+        """
+        raise NotImplementedError
+
+    def create(self, year_month: str) -> None:
+        """
+        Create an empty month.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+        """
+        self.write(year_month, MonthShifts(year_month))
+
+    def write(self, year_month: str, shifts: MonthShifts) -> None:
+        """
+        Replace the whole month (creating it if needed) with the entries of shifts.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            shifts (MonthShifts): shifts of the month.
+        """
+        raise NotImplementedError
+
+    def append(self, year_month: str, entry: dict[str, str]) -> None:
+        """
+        Add an entry of a date that does not exist yet in an existing month.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            entry (dict[str, str]): entry with the configured COLUMNS as keys.
+        """
+        raise NotImplementedError
+
+    def remove(self, year_month: str, date: str, remaining: MonthShifts) -> None:
+        """
+        Remove the entry of an existing date.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            date (str): date in "yyyy-mm-dd" format.
+            remaining (MonthShifts): every entry of the month except the removed one.
+        """
+        raise NotImplementedError
+
+    def remove_date(self, year_month: str, date: str) -> bool:
+        """
+        Remove the entry of a date without the rest of the month in memory.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            date (str): date in "yyyy-mm-dd" format.
+
+        Returns:
+            bool: True if an entry was removed, False if the entry does not exist.
+        """
+        shifts = self.read(year_month)
+        if shifts.remove(parse_day(date)) is None:
+            return False
+        self.remove(year_month, date, shifts)
+        return True
+
+    def archive(self, year_month: str, profile: WageProfile = DEFAULT_WAGE_PROFILE) -> bool:
+        """
+        Convert a finished month to the binary archive format. Backends without one do nothing.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            profile (WageProfile, optional): wages to store the totals with. Defaults to DEFAULT_WAGE_PROFILE.
+
+        Returns:
+            bool: True if the month was converted, False if it does not exist or is already archived.
+        """
+        return False
+
+    def calculate_totals(self, year_month: str, shifts: MonthShifts,
+                         profile: WageProfile = DEFAULT_WAGE_PROFILE) -> MonthTotals:
+        """
+        Calculate the totals of a month from scratch.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+            shifts (MonthShifts): every entry of the month.
+            profile (WageProfile, optional): wages to pay. Defaults to DEFAULT_WAGE_PROFILE.
+
+        Returns:
+            MonthTotals: totals of the month.
+        """
+        return calculate_totals(shifts, profile)
+
+
+class CsvStorage(ShiftStorage):
+    """
+    One csv file per month, named worktime_info/{FILE_FORMAT}yyyy-mm.csv
+    (worktime_info/{worker}/{FILE_FORMAT}yyyy-mm.csv for named workers).
+
+    With CSV_WRITE_MODE=log, a month file is treated as an append-only log: removing an entry appends a
+    tombstone row (the date with empty start/end time) instead of rewriting the file, and the file is
+    compacted once it holds more dead rows than live ones. Adding and removing an entry therefore cost a
+    single appended line regardless of the size of the month.
+
+    A finished month can be converted to a binary archive ({FILE_FORMAT}yyyy-mm.bin, see shift_archive),
+    which replaces its csv file. Archived months are read from the archive, and their stored totals are used
+    instead of recalculating them. Changing an archived month converts it back to a csv file first.
+
+    Files are rewritten atomically and appended to with single writes (see atomic_files), and every change of
+    a month holds the advisory lock .{FILE_FORMAT}yyyy-mm.lock, so several programs can write at the same time.
+    """
+
+    def __init__(self, directory: str = DATA_DIRECTORY, write_mode: str = CSV_WRITE_MODE, worker: str | None = None):
+        worker = validate_worker(worker)
+        self.directory = f"{directory}/{worker}" if worker else directory
+        self.write_mode = write_mode
+        self._dead_rows: dict[str, int] = {}
+        self._archive_headers: dict[str, ArchiveHeader] = {}
+
+    def get_path(self, year_month: str) -> str:
+        """
+        Get the path of the csv file of the queried month.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            str: path of the csv file.
+        """
+        return f"{self.directory}/{FILE_FORMAT}{year_month}.csv"
+
+    def get_archive_path(self, year_month: str) -> str:
+        """
+        Get the path of the archive file of the queried month.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            str: path of the archive file.
+        """
+        return f"{self.directory}/{FILE_FORMAT}{year_month}{ARCHIVE_SUFFIX}"
+
+    def is_archived(self, year_month: str) -> bool:
+        """
+        Check if the queried month is stored as an archive file.
+
+        Args:
+            year_month (str): year and month in "yyyy-mm" format.
+
+        Returns:
+            bool: True if the month is archived.
+        """
+        return not os.path.exists(self.get_path(year_month)) and os.path.exists(self.get_archive_path(year_month))
+
+    def list_months(self, start_year_month: str | None = None, end_year_month: str | None = None) -> list[str]:
+        months = set()
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith(FILE_FORMAT):
+                    continue
+                if name.endswith(".csv"):
+                    year_month = name[len(FILE_FORMAT):-len(".csv")]
+                elif name.endswith(ARCHIVE_SUFFIX):
+                    year_month = name[len(FILE_FORMAT):-len(ARCHIVE_SUFFIX)]
+                else:
+                    continue
+                # e.g. a file left by an older version for an invalid month such as 2024-13
+                if not is_year_month(year_month):
+                    continue
+                if start_year_month and year_month < start_year_month:
+                    continue
+                if end_year_month and year_month > end_year_month:
+                    continue
+                months.add(year_month)
+        return sorted(months)
+
+    def get_signature(self, year_month: str) -> tuple[str, int, int, int] | None:
+        for path in (self.get_path(year_month), self.get_archive_path(year_month)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # every rewrite replaces the file, so the inode tells rewrites apart even within one mtime tick
+            return (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        return None
+
+    def lock(self, year_month: str) -> AbstractContextManager:
+        return lock_file(f"{self.directory}/.{FILE_FORMAT}{year_month}.lock")
+
+    def read(self, year_month: str) -> MonthShifts:
+        if self.is_archived(year_month):
+            shifts, self._archive_headers[year_month] = read_archive(self.get_archive_path(year_month), year_month)
+            return shifts
+        self._archive_headers.pop(year_month, None)
+        return MonthShifts.from_rows(year_month, self._read_rows(year_month).values())
+
+    def _read_rows(self, year_month: str) -> dict[str, list[str]]:
+        # the last row of a date wins; a tombstone (no start time) means the entry was removed
+        count("csv.read")
+        with open(self.get_path(year_month), newline="") as csvfile:
+            reader = csv.reader(read_complete_lines(csvfile))
+            next(reader, None)
+            rows = {}
+            row_count = 0
+            for row in reader:
+                if len(row) < len(COLUMNS):
+                    continue
+                rows[row[0]] = row
+                row_count += 1
+        rows = {date: row for date, row in rows.items() if row[1]}
+        self._dead_rows[year_month] = row_count - len(rows)
+        return rows
+
+    def create(self, year_month: str) -> None:
+        with self.lock(year_month):
+            if self.get_signature(year_month) is None:
+                self._write_rows(year_month, [])
+
+    def write(self, year_month: str, shifts: MonthShifts) -> None:
+        with self.lock(year_month):
+            self._write_rows(year_month, shifts.rows())
+
+    def _write_rows(self, year_month: str, rows: Iterable[Sequence[str]]) -> None:
+        count("csv.write")
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(self.get_path(year_month), newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        self._dead_rows[year_month] = 0
+        # the csv file now holds the whole month, so an archive of it is out of date
+        self._archive_headers.pop(year_month, None)
+        try:
+            os.remove(self.get_archive_path(year_month))
+        except FileNotFoundError:
+            pass
+
+    def _reopen(self, year_month: str) -> None:
+        """
+        Convert an archived month back to a csv file before it is changed.
+        """
+        if self.is_archived(year_month):
+            self.write(year_month, self.read(year_month))
+
+    def append(self, year_month: str, entry: dict[str, str]) -> None:
+        line = io.StringIO()
+        csv.DictWriter(line, fieldnames=COLUMNS).writerow(entry)
+        with self.lock(year_month):
+            self._reopen(year_month)
+            count("csv.append")
+            append_line(self.get_path(year_month), line.getvalue())
+
+    def remove(self, year_month: str, date: str, remaining: MonthShifts) -> None:
+        with self.lock(year_month):
+            if (self.write_mode != "log" or self.is_archived(year_month)
+                    or self._append_tombstone(year_month, date, len(remaining))):
+                self.write(year_month, remaining)
+
+    def remove_date(self, year_month: str, date: str) -> bool:
+        with self.lock(year_month):
+            self._reopen(year_month)
+            rows = self._read_rows(year_month)
+            if rows.pop(date, None) is None:
+                return False
+            if self.write_mode != "log" or self._append_tombstone(year_month, date, len(rows)):
+                self._write_rows(year_month, rows.values())
+            return True
+
+    def _append_tombstone(self, year_month: str, date: str, live_rows: int) -> bool:
+        """
+        Append a tombstone of the removed date in log mode.
+
+        Returns:
+            bool: True if the file now holds enough dead rows to be compacted.
+        """
+        self.append(year_month, {column: "" for column in COLUMNS} | {"date": date})
+        # the removed row and its tombstone
+        dead_rows = self._dead_rows.get(year_month, 0) + 2
+        self._dead_rows[year_month] = dead_rows
+        return dead_rows >= max(COMPACTION_MIN_DEAD_ROWS, live_rows)
+
+    def archive(self, year_month: str, profile: WageProfile = DEFAULT_WAGE_PROFILE) -> bool:
+        with self.lock(year_month):
+            if not os.path.exists(self.get_path(year_month)):
+                return False
+            shifts = self.read(year_month)
+            totals = calculate_totals(shifts, profile)
+            write_archive(self.get_archive_path(year_month), shifts, totals, profile)
+            os.remove(self.get_path(year_month))
+            self._dead_rows.pop(year_month, None)
+            self._archive_headers[year_month] = ArchiveHeader(
+                (profile.weekday_wage, profile.weekend_wage, profile.transit_fee), get_pay_rules(profile).rules_id,
+                totals)
+            return True
+
+    def calculate_totals(self, year_month: str, shifts: MonthShifts,
+                         profile: WageProfile = DEFAULT_WAGE_PROFILE) -> MonthTotals:
+        header = self._archive_headers.get(year_month)
+        totals = header.get_totals(profile) if header is not None and header.totals.days == len(shifts) else None
+        return totals if totals is not None else calculate_totals(shifts, profile)
+
+
+class SqliteStorage(ShiftStorage):
+    """
+    A single SQLite database shared by every worker. Shifts are stored in a table clustered by worker and
+    date, and each month of a worker keeps a version number that is incremented on every change so that
+    other processes' writes are noticed. A month is read with a single query over its date range.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, worker: str | None = None):
+        self.path = path
+        self.worker = validate_worker(worker)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS months (
+                    worker TEXT NOT NULL,
+                    year_month TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    PRIMARY KEY (worker, year_month)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS shifts (
+                    worker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    PRIMARY KEY (worker, date)
+                ) WITHOUT ROWID;
+            """)
+
+    @staticmethod
+    def _get_date_range(year_month: str) -> tuple[str, str]:
+        return f"{year_month}-01", f"{year_month}-31"
+
+    @staticmethod
+    def _normalize_time(time: str) -> str:
+        hour, minute = time.split(":")
+        return f"{int(hour):02d}:{int(minute):02d}"
+
+    def _execute(self, query: str, parameters: tuple | list = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def _bump_version(self, year_month: str) -> None:
+        self._connection.execute(
+            "INSERT INTO months (worker, year_month, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (worker, year_month) DO UPDATE SET version = version + 1", (self.worker, year_month))
+
+    def list_months(self, start_year_month: str | None = None, end_year_month: str | None = None) -> list[str]:
+        rows = self._execute("SELECT year_month FROM months WHERE worker = ? AND year_month BETWEEN ? AND ? "
+                             "ORDER BY year_month", (self.worker, start_year_month or "", end_year_month or "9999-99"))
+        return [year_month for year_month, in rows]
+
+    def get_signature(self, year_month: str) -> int | None:
+        rows = self._execute("SELECT version FROM months WHERE worker = ? AND year_month = ?", (self.worker, year_month))
+        return rows[0][0] if rows else None
+
+    def read(self, year_month: str) -> MonthShifts:
+        count("sqlite.read")
+        rows = self._execute("SELECT date, start_time, end_time FROM shifts WHERE worker = ? AND date BETWEEN ? AND ? "
+                             "ORDER BY date", (self.worker, *self._get_date_range(year_month)))
+        return MonthShifts.from_rows(year_month, rows)
+
+    def create(self, year_month: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._bump_version(year_month)
+
+    def write(self, year_month: str, shifts: MonthShifts) -> None:
+        count("sqlite.write")
+        rows = [(self.worker, date, start_time, end_time) for date, start_time, end_time in shifts.rows()]
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM shifts WHERE worker = ? AND date BETWEEN ? AND ?",
+                                     (self.worker, *self._get_date_range(year_month)))
+            self._connection.executemany("INSERT INTO shifts (worker, date, start_time, end_time) VALUES (?, ?, ?, ?)",
+                                         rows)
+            self._bump_version(year_month)
+
+    def append(self, year_month: str, entry: dict[str, str]) -> None:
+        count("sqlite.append")
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("INSERT INTO shifts (worker, date, start_time, end_time) VALUES (?, ?, ?, ?)",
+                                     (self.worker, entry["date"], self._normalize_time(entry["start_time"]),
+                                      self._normalize_time(entry["end_time"])))
+            self._bump_version(year_month)
+
+    def remove(self, year_month: str, date: str, remaining: MonthShifts) -> None:
+        self.remove_date(year_month, date)
+
+    def remove_date(self, year_month: str, date: str) -> bool:
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            cursor = self._connection.execute("DELETE FROM shifts WHERE worker = ? AND date = ?", (self.worker, date))
+            if cursor.rowcount == 0:
+                return False
+            self._bump_version(year_month)
+            return True
+
+
+def create_storage(backend: str = STORAGE_BACKEND, worker: str | None = None,
+                   directory: str = DATA_DIRECTORY) -> ShiftStorage:
+    """
+    Create the storage backend selected by STORAGE_BACKEND in the configuration file.
+
+    Args:
+        backend (str, optional): "csv" or "sqlite". Defaults to STORAGE_BACKEND.
+        worker (str | None, optional): worker whose data the backend holds. The default worker if None. Defaults to None.
+        directory (str, optional): data directory of the csv backend. Defaults to DATA_DIRECTORY.
+
+    Returns:
+        ShiftStorage: the storage backend.
+    """
+    if backend == "csv":
+        return CsvStorage(directory, worker=worker)
+    elif backend == "sqlite":
+        return SqliteStorage(worker=worker)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def list_workers(backend: str = STORAGE_BACKEND, directory: str = DATA_DIRECTORY) -> list[str]:
+    """
+    Get the named workers that have data in the storage. The default worker is not included.
+
+    Args:
+        backend (str, optional): "csv" or "sqlite". Defaults to STORAGE_BACKEND.
+        directory (str, optional): data directory of the csv backend. Defaults to DATA_DIRECTORY.
+
+    Returns:
+        list[str]: names of the workers, in ascending order.
+    """
+    if backend == "csv":
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return sorted(entry.name for entry in entries
+                          if entry.is_dir() and _WORKER_PATTERN.fullmatch(entry.name))
+    elif backend == "sqlite":
+        rows = SqliteStorage()._execute("SELECT DISTINCT worker FROM months WHERE worker != ? ORDER BY worker",
+                                        (DEFAULT_WORKER,))
+        return [worker for worker, in rows]
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def migrate_storage(source: ShiftStorage, destination: ShiftStorage) -> int:
+    """
+    Copy every month from one storage backend to another, e.g. from the csv files to SQLite.
+
+    Args:
+        source (ShiftStorage): storage to copy from.
+        destination (ShiftStorage): storage to copy to. Months that exist in both are replaced.
+
+    Returns:
+        int: number of copied months.
+    """
+    year_months = source.list_months()
+    for year_month in year_months:
+        destination.write(year_month, source.read(year_month))
+    return len(year_months)
@@ -1,11 +1,42 @@
 """
 Module for utility functions that are used in the project.
 """
+import importlib
 from datetime import datetime
-from module.baito_configuration import BaitoConfiguration
+from types import ModuleType
+from module.baito_configuration import get_config
 
-config = BaitoConfiguration()
-FILE_DATE_FORMAT = config.get_file_date_format()
+config = get_config()
+FILE_DATE_FORMAT = config.file_date_format
+
+
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module: ModuleType | None = None
+
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module only when it is first used, e.g. pandas, which takes longer to import than the whole
+    add/remove path of the text CLI. Annotations that mention the module must not be evaluated
+    (use "from __future__ import annotations").
+
+    Args:
+        name (str): name of the module, e.g. "pandas".
+
+    Returns:
+        ModuleType: proxy that behaves like the module.
+    """
+    return _LazyModule(name)
 
 
 def thousands_separators(num: int) -> str:
@@ -0,0 +1,105 @@
+"""
+Module for caching the workdays of each month for the calendars of the GUI.
+A month is stored as a bitmap (bit d is set if day d is a workday), fetched once through the background
+service and shared by every calendar. It is only fetched again after a workday of the month is added or removed.
+"""
+from typing import Callable
+from module.background_service import BackgroundService
+from module.shift_manage import BaitoManage
+
+
+def _fetch_workdays_bitmap(year: int, month: int) -> int:
+    workdays = BaitoManage.get_workdays_list(str(year), f"{month:02d}") or []
+    bitmap = 0
+    for workday in workdays:
+        bitmap |= 1 << int(workday.rsplit("-", 1)[1])
+    return bitmap
+
+
+def iter_days(bitmap: int) -> list[int]:
+    """
+    Get the days set in a workday bitmap.
+
+    Args:
+        bitmap (int): workday bitmap of a month.
+
+    Returns:
+        list[int]: days of the month, in ascending order.
+    """
+    return [day for day in range(1, 32) if bitmap >> day & 1]
+
+
+class WorkdayCache:
+    def __init__(self, service: BackgroundService):
+        self._service = service
+        self._bitmaps: dict[tuple[int, int], int] = {}
+        self._waiting: dict[tuple[int, int], list[Callable[[int], None]]] = {}
+        self._listeners: list[Callable[[int, int, int], None]] = []
+
+    def get(self, year: int, month: int, on_done: Callable[[int], None]) -> None:
+        """
+        Get the workday bitmap of a month.
+        on_done is called immediately if the month is cached, otherwise once it has been fetched.
+
+        Args:
+            year (int): year of the month.
+            month (int): month (1-12).
+            on_done (Callable[[int], None]): called on the main thread with the bitmap.
+        """
+        key = (year, month)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is not None:
+            on_done(bitmap)
+            return
+        waiting = self._waiting.get(key)
+        if waiting is not None:
+            waiting.append(on_done)
+            return
+
+        self._waiting[key] = [on_done]
+        self._service.submit(f"workday_cache_{year}-{month:02d}", _fetch_workdays_bitmap, year, month,
+                             on_done=lambda bitmap: self._deliver(key, bitmap, cache=True),
+                             on_error=lambda error: self._deliver(key, 0, cache=False))
+
+    def get_cached(self, year: int, month: int) -> int | None:
+        """
+        Get the workday bitmap of a month only if it is cached.
+
+        Args:
+            year (int): year of the month.
+            month (int): month (1-12).
+
+        Returns:
+            int | None: bitmap of the month, or None if it is not cached.
+        """
+        return self._bitmaps.get((year, month))
+
+    def subscribe(self, listener: Callable[[int, int, int], None]) -> None:
+        """
+        Register a function called with (year, month, bitmap) whenever a month is fetched again after a change.
+
+        Args:
+            listener (Callable[[int, int, int], None]): function to call on the main thread.
+        """
+        self._listeners.append(listener)
+
+    def invalidate(self, year: int, month: int) -> None:
+        """
+        Drop a month after one of its workdays was added or removed, fetch it again and notify the listeners.
+
+        Args:
+            year (int): year of the month.
+            month (int): month (1-12).
+        """
+        self._bitmaps.pop((year, month), None)
+        self.get(year, month, lambda bitmap: self._notify(year, month, bitmap))
+
+    def _notify(self, year: int, month: int, bitmap: int) -> None:
+        for listener in self._listeners:
+            listener(year, month, bitmap)
+
+    def _deliver(self, key: tuple[int, int], bitmap: int, cache: bool) -> None:
+        if cache:
+            self._bitmaps[key] = bitmap
+        for on_done in self._waiting.pop(key, []):
+            on_done(bitmap)
@@ -0,0 +1,32 @@
+import json
+import os
+from module.payroll_batch import run_payroll, summarize_payroll, write_report
+
+
+def _write_month(directory: str, worker: str, year_month: str, rows: list[str]) -> None:
+    worker_directory = os.path.join(directory, worker)
+    os.makedirs(worker_directory, exist_ok=True)
+    with open(os.path.join(worker_directory, f"worktime_{year_month}.csv"), "w") as csv_file:
+        csv_file.write("date,start_time,end_time\n" + "".join(f"{row}\n" for row in rows))
+
+
+def test_summary_keeps_workers_of_different_directories_apart(tmp_path):
+    first, second = str(tmp_path / "first"), str(tmp_path / "second")
+    _write_month(first, "tanaka", "2024-07", ["2024-07-01,17:00,22:00"])
+    _write_month(second, "tanaka", "2024-07", ["2024-07-01,09:00,17:00", "2024-07-02,09:00,17:00"])
+
+    rows = run_payroll("2024-07", "2024-07", ["tanaka"], [first, second], backend="csv", processes=1)
+    summary = summarize_payroll(rows)
+
+    assert list(summary) == [(first, "tanaka"), (second, "tanaka")]
+    assert summary[(first, "tanaka")]["days"] == 1
+    assert summary[(first, "tanaka")]["hours"] == 5
+    assert summary[(second, "tanaka")]["days"] == 2
+    assert summary[(second, "tanaka")]["hours"] == 16
+
+    report_path = str(tmp_path / "report.json")
+    write_report(rows, report_path)
+    with open(report_path) as report_file:
+        workers = json.load(report_file)["workers"]
+    assert [(worker["directory"], worker["worker"], worker["days"]) for worker in workers] == \
+        [(first, "tanaka", 1), (second, "tanaka", 2)]
@@ -0,0 +1,36 @@
+from module.pay_calculation import calculate_totals
+from module.shift_records import MonthShifts
+from module.storage import CsvStorage, SqliteStorage, migrate_storage
+
+
+def _month(year_month: str, rows: list[tuple[str, str, str]]) -> MonthShifts:
+    return MonthShifts.from_rows(year_month, rows)
+
+
+def test_migrate_storage_copies_every_month_from_csv_to_sqlite(tmp_path):
+    source = CsvStorage(str(tmp_path / "worktime_info"), worker="tanaka")
+    july = _month("2024-07", [("2024-07-01", "17:00", "22:00"), ("2024-07-31", "22:00", "02:00")])
+    august = _month("2024-08", [("2024-08-05", "09:00", "17:00")])
+    source.write("2024-07", july)
+    source.write("2024-08", august)
+    destination = SqliteStorage(str(tmp_path / "worktime.db"), worker="tanaka")
+    # replaced by the migration
+    destination.write("2024-08", _month("2024-08", [("2024-08-06", "10:00", "12:00")]))
+
+    assert migrate_storage(source, destination) == 2
+
+    assert destination.list_months() == ["2024-07", "2024-08"]
+    for year_month, shifts in (("2024-07", july), ("2024-08", august)):
+        assert sorted(destination.read(year_month).rows()) == sorted(shifts.rows())
+    assert SqliteStorage(str(tmp_path / "worktime.db"), worker="").list_months() == []
+
+
+def test_sqlite_totals_use_the_given_shifts(tmp_path):
+    storage = SqliteStorage(str(tmp_path / "worktime.db"))
+    storage.write("2024-07", _month("2024-07", [("2024-07-01", "17:00", "22:00")]))
+    shifts = _month("2024-07", [("2024-07-01", "17:00", "22:00"), ("2024-07-02", "22:00", "02:00")])
+
+    totals = storage.calculate_totals("2024-07", shifts)
+
+    assert totals.is_close(calculate_totals(shifts))
+    assert totals.days == 2